@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+"""
+Build the Six Degrees demo page for a fast first search.
+
+The page's loadData is replaced by one that fetches people, movies and
+stars concurrently, <link rel="preload"> hints for the same files are put
+in <head> so the browser starts downloading them while the page parses, and
+optionally a small starter subgraph (see convert_to_json.sample_subgraph)
+is inlined so searches work before the full data arrives.
+
+    python build_six_degrees_page.py --starter 200
+    python build_six_degrees_page.py --dry-run
+    python build_six_degrees_page.py measure --latency-ms 50 --starter 200
+
+`measure` serves the site from a local http.server, adding --latency-ms to
+every response to stand in for a network round-trip, and runs each page's
+own loadData under Node with a minimal DOM. Time-to-interactive is when the
+Find button is enabled; full load is when loadData resolves.
+"""
+import argparse
+import json
+import os
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+from convert_to_json import (JSON_DIR, TABLES, join_stars, sample_subgraph, select_tables, semi_join,
+                             string_values)
+from patch_html import find_functions, patch_source, read_page, save_page
+from restore_html import HTML_FILE, JSON_LOAD_DATA
+
+SITE_ROOT = "public"
+DATA_URL = "/" + os.path.relpath(JSON_DIR, SITE_ROOT).replace(os.sep, "/")
+BLOCK_START = "<!-- six-degrees data: generated by build_six_degrees_page.py -->"
+BLOCK_END = "<!-- /six-degrees data -->"
+STARTER_ID = "starter-data"
+
+LOAD_DATA = '''        async function loadData() {
+            // Show loading indicator
+            document.getElementById('loading').style.display = 'block';
+            document.getElementById('findBtn').disabled = true;
+
+            function addData(peopleData, moviesData, starsData) {
+                for (const person of peopleData) {
+                    const id = person.id;
+                    const name = person.name;
+
+                    people[id] = {
+                        name: name,
+                        birth: person.birth || '',
+                        movies: new Set()
+                    };
+
+                    if (!names[name.toLowerCase()]) {
+                        names[name.toLowerCase()] = new Set();
+                    }
+                    names[name.toLowerCase()].add(id);
+                }
+
+                for (const movie of moviesData) {
+                    movies[movie.id] = {
+                        title: movie.title,
+                        year: movie.year || '',
+                        stars: new Set()
+                    };
+                }
+
+                for (const star of starsData) {
+                    const personId = star.person_id;
+                    const movieId = star.movie_id;
+
+                    if (people[personId] && movies[movieId]) {
+                        people[personId].movies.add(movieId);
+                        movies[movieId].stars.add(personId);
+                    }
+                }
+            }
+
+            function showStatus(message) {
+                const resultElement = document.getElementById('result');
+                resultElement.innerHTML = `<div class="success">${message}</div>`;
+                resultElement.style.display = 'block';
+            }
+
+            // A starter subgraph inlined at build time makes search usable
+            // before the full data arrives
+            const starter = document.getElementById('%(starter_id)s');
+            if (starter) {
+                const data = JSON.parse(starter.textContent);
+                addData(data.people, data.movies, data.stars);
+                document.getElementById('findBtn').disabled = false;
+                showStatus(`Starter graph loaded: ${Object.keys(people).length} people, loading the full database...`);
+            }
+
+            try {
+                console.log('Loading people, movies and stars data...');
+                const [peopleData, moviesData, starsData] = await Promise.all(
+                    %(tables)s.map(name => fetch(`%(data_url)s/${name}.json`).then(response => {
+                        if (!response.ok) {
+                            throw new Error(`${name}.json: HTTP ${response.status}`);
+                        }
+                        return response.json();
+                    }))
+                );
+                console.log(`Loaded ${peopleData.length} people, ${moviesData.length} movies and ${starsData.length} star connections`);
+
+                if (starter) {
+                    // The full data replaces the starter graph rather than
+                    // merging with it, so no edge is left pointing one way
+                    for (const table of [people, movies, names]) {
+                        for (const key of Object.keys(table)) {
+                            delete table[key];
+                        }
+                    }
+                }
+                addData(peopleData, moviesData, starsData);
+
+                console.log('Data loaded successfully!');
+                console.log(`Final: ${Object.keys(people).length} people and ${Object.keys(movies).length} movies`);
+
+                // Hide loading indicator and enable button
+                document.getElementById('loading').style.display = 'none';
+                document.getElementById('findBtn').disabled = false;
+                showStatus(`Database loaded: ${Object.keys(people).length} people, ${Object.keys(movies).length} movies`);
+
+            } catch (error) {
+                console.error('Error loading data:', error);
+                document.getElementById('loading').style.display = 'none';
+                document.getElementById('findBtn').disabled = false;
+                alert('Error loading database. Please refresh the page.');
+            }
+        }'''
+
+# Runs a page's loadData under Node against the local server. Fetches for
+# preloaded URLs reuse the request started when the page arrived, as the
+# browser's preload cache does.
+HARNESS = r'''
+import { readFileSync } from 'node:fs';
+
+const [base, pageUrl, loaderPath] = process.argv.slice(2);
+const networkFetch = globalThis.fetch;
+const start = performance.now();
+const html = await (await networkFetch(new URL(pageUrl, base))).text();
+
+const preloaded = new Map();
+for (const match of html.matchAll(/<link rel="preload" href="([^"]+)"/g)) {
+    preloaded.set(match[1], networkFetch(new URL(match[1], base)));
+}
+globalThis.fetch = url => {
+    const pending = preloaded.get(url);
+    preloaded.delete(url);
+    return pending || networkFetch(new URL(url, base));
+};
+
+const starter = html.match(/<script type="application\/json" id="%(starter_id)s">([\s\S]*?)<\/script>/);
+let interactive = null;
+const elements = {};
+globalThis.document = {
+    getElementById(id) {
+        if (id === '%(starter_id)s') {
+            return starter ? { textContent: starter[1] } : null;
+        }
+        if (!elements[id]) {
+            let disabled = false;
+            elements[id] = {
+                style: {}, innerHTML: '',
+                get disabled() { return disabled; },
+                set disabled(value) {
+                    if (id === 'findBtn' && !value && interactive === null) {
+                        interactive = performance.now() - start;
+                    }
+                    disabled = value;
+                },
+            };
+        }
+        return elements[id];
+    },
+};
+globalThis.people = {};
+globalThis.movies = {};
+globalThis.names = {};
+globalThis.alert = message => { throw new Error(message); };
+console.log = () => {};
+
+(0, eval)(readFileSync(loaderPath, 'utf8'));
+await loadData();
+const loaded = performance.now() - start;
+
+let oneWay = 0;
+for (const [id, person] of Object.entries(people)) {
+    for (const movie of person.movies) {
+        if (!movies[movie] || !movies[movie].stars.has(id)) {
+            oneWay++;
+        }
+    }
+}
+process.stdout.write(JSON.stringify({ interactive, loaded, people: Object.keys(people).length, oneWay }));
+'''
+
+
+def load_data_source(data_url=DATA_URL):
+    """The concurrent loadData, fetching every exported table from data_url."""
+    return LOAD_DATA % {"starter_id": STARTER_ID, "tables": json.dumps(list(TABLES)).replace('"', "'"),
+                        "data_url": data_url}
+
+
+def starter_json(sample, all_rows=False):
+    """Minified {"people": [...], "movies": [...], "stars": [...]} of a sampled subgraph.
+
+    The sample is drawn from the joined tables under the same caps as the
+    export, so its people and movies are ones the full load also ships.
+    Rows look like the exported JSON files, and '</' is escaped so the data
+    cannot close its <script> element.
+    """
+    tables = select_tables({name: None if all_rows else cap for name, (_, cap) in TABLES.items()})
+    person_ids, movie_ids = sample_subgraph(tables['stars'], sample)
+    people = semi_join(tables['people'], 'id', person_ids)
+    movies = semi_join(tables['movies'], 'id', movie_ids)
+    tables = {'people': people, 'movies': movies, 'stars': join_stars(people, movies, tables['stars'])}
+    data = {}
+    for name, table in tables.items():
+        columns = {column: string_values(table.column(column), column) for column in TABLES[name][0]}
+        data[name] = [dict(zip(columns, row)) for row in zip(*columns.values())]
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).replace("</", "<\\/")
+
+
+def head_block(data_url=DATA_URL, starter=None, preload=True, indent="    "):
+    """Generated <head> markup: preload hints and the optional inlined starter graph."""
+    lines = [BLOCK_START]
+    if preload:
+        lines += [f'<link rel="preload" href="{data_url}/{name}.json" as="fetch" crossorigin>'
+                  for name in TABLES]
+    if starter is not None:
+        lines.append(f'<script type="application/json" id="{STARTER_ID}">{starter}</script>')
+    lines.append(BLOCK_END)
+    return "\n".join(indent + line for line in lines)
+
+
+def set_head_block(html, block):
+    """Replace the generated block in html, or insert it just before </head>."""
+    start = html.find(BLOCK_START)
+    if start >= 0:
+        end = html.index(BLOCK_END, start) + len(BLOCK_END)
+        start = html.rfind("\n", 0, start) + 1
+        return html[:start] + block + html[end:]
+
+    head_end = re.search(r"</head\s*>", html, re.IGNORECASE)
+    if head_end is None:
+        raise ValueError("no </head> to put the data hints before")
+    line_start = html.rfind("\n", 0, head_end.start()) + 1
+    if html[line_start:head_end.start()].strip():
+        line_start = head_end.start()
+    return html[:line_start] + block + "\n" + html[line_start:]
+
+
+def build_page(html, starter=None, preload=True):
+    """html with the concurrent loadData and a regenerated <head> block."""
+    html = patch_source(html, {"loadData": load_data_source()})
+    block = head_block(starter=starter, preload=preload)
+    if "\r\n" in html:
+        block = block.replace("\n", "\r\n")
+    return set_head_block(html, block)
+
+
+def build(page=HTML_FILE, sample=None, preload=True, dry_run=False, all_rows=False):
+    original = read_page(page)
+    starter = starter_json(sample, all_rows) if sample else None
+    updated = build_page(original, starter, preload)
+    if updated == original:
+        print(f"{page} is already up to date")
+        return
+    save_page(page, original, updated, dry_run)
+    if not dry_run:
+        size = f", {len(starter.encode()) / 1024:.1f} KB starter graph inlined" if starter else ""
+        print(f"Built {page}{size}")
+
+
+class DelayedHandler(SimpleHTTPRequestHandler):
+    """Static files plus in-memory page variants, each response delayed by `latency`."""
+
+    latency = 0.0
+    pages = {}
+
+    def do_GET(self):
+        time.sleep(self.latency)
+        body = self.pages.get(self.path)
+        if body is None:
+            return super().do_GET()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def time_to_interactive(base, page_url, html, runs):
+    """Median interactive and full-load milliseconds of a page's own loadData."""
+    loader = find_functions(html)["loadData"][0]
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        loader_path = os.path.join(tmp, "loadData.js")
+        harness_path = os.path.join(tmp, "harness.mjs")
+        with open(loader_path, "w", encoding="utf-8") as f:
+            f.write(html[slice(*loader)])
+        with open(harness_path, "w", encoding="utf-8") as f:
+            f.write(HARNESS % {"starter_id": STARTER_ID})
+        for _ in range(runs):
+            output = subprocess.run(["node", harness_path, base, page_url, loader_path],
+                                    capture_output=True, text=True, check=True).stdout
+            results.append(json.loads(output))
+            if results[-1]["oneWay"]:
+                raise ValueError(f"{page_url} left {results[-1]['oneWay']} person-movie edges pointing one way")
+    return (statistics.median(r["interactive"] for r in results),
+            statistics.median(r["loaded"] for r in results), results[0]["people"])
+
+
+def measure(page=HTML_FILE, root=SITE_ROOT, latency_ms=50, runs=5, sample=None, all_rows=False):
+    """Print time-to-interactive of the sequential JSON loader against the built page."""
+    if shutil.which("node") is None:
+        print("Error: measuring needs Node.js (node) on the PATH")
+        sys.exit(1)
+
+    original = read_page(page)
+    variants = {
+        "sequential (restore_html.py)": patch_source(original, {"loadData": JSON_LOAD_DATA}),
+        "concurrent": build_page(original, preload=False),
+        "concurrent + preload": build_page(original),
+    }
+    if sample:
+        variants["concurrent + preload + starter"] = build_page(original, starter_json(sample, all_rows))
+    if BLOCK_START in original:
+        variants["sequential (restore_html.py)"] = set_head_block(
+            variants["sequential (restore_html.py)"], head_block(preload=False))
+
+    DelayedHandler.latency = latency_ms / 1000
+    DelayedHandler.pages = {f"/__variant{k}.html": html.encode("utf-8") for k, html in enumerate(variants.values())}
+    server = ThreadingHTTPServer(("127.0.0.1", 0), partial(DelayedHandler, directory=root))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        print(f"{latency_ms} ms per request, median of {runs} runs")
+        print(f"{'page':<32}{'interactive':>13}{'full load':>11}{'people':>9}")
+        for k, (label, html) in enumerate(variants.items()):
+            interactive, loaded, people = time_to_interactive(base, f"/__variant{k}.html", html, runs)
+            print(f"{label:<32}{interactive:>11.0f}ms{loaded:>9.0f}ms{people:>9,}")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the Six Degrees page for a fast first search")
+    parser.add_argument("command", nargs="?", choices=["build", "measure"], default="build")
+    parser.add_argument("--page", default=HTML_FILE)
+    parser.add_argument("--starter", type=int, metavar="PEOPLE",
+                        help="inline a connected starter subgraph of about this many people")
+    parser.add_argument("--all-rows", action="store_true",
+                        help="draw the starter from every row, for pages serving an --all-rows export")
+    parser.add_argument("--no-preload", action="store_true", help="leave out the preload hints")
+    parser.add_argument("--dry-run", action="store_true", help="print a diff instead of writing")
+    parser.add_argument("--root", default=SITE_ROOT, help="site root served when measuring")
+    parser.add_argument("--latency-ms", type=float, default=50, help="delay added to every response when measuring")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "measure":
+            measure(args.page, args.root, args.latency_ms, args.runs, args.starter, args.all_rows)
+        else:
+            build(args.page, args.starter, not args.no_preload, args.dry_run, args.all_rows)
+    except (OSError, ValueError) as error:
+        print(f"Error: {error}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,14 @@
+"""Peak memory reporting shared by the export and MNIST scripts (stdlib only)."""
+import sys
+
+
+def peak_rss_mb(children=False):
+    """Peak RSS in MB of this process (or its largest finished child), or None."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    who = resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF
+    peak = resource.getrusage(who).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
@@ -1,12 +1,83 @@
+"""
+MNIST digits with a small 400-25-15-10 network, trained in Keras and run
+again with NumPy forward passes.
+
+Importing this module only needs NumPy; TensorFlow and matplotlib are
+imported inside the functions that use them. Run it as a script to train:
+
+    python mnist_0_9_adapted.py train --weights mnist_weights.npz
+    python mnist_0_9_adapted.py predict --weights mnist_weights.npz --images batch.npy
+    python mnist_0_9_adapted.py stream --images huge.npy --output labels.npy
+    python mnist_0_9_adapted.py parallel --images batch.npy --workers 8
+    python mnist_0_9_adapted.py bench --output bench.json --baseline baseline.json
+    python mnist_0_9_adapted.py kernels --rows 65536
+    python mnist_0_9_adapted.py import-time
+"""
+import argparse
+import glob
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
 import numpy as np
-import tensorflow as tf
-from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import Dense
-import matplotlib.pyplot as plt
 
+from memory_usage import peak_rss_mb
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".mnist_cache")
+# Bump when the preprocessing changes so older cache files are discarded
+CACHE_VERSION = 1
+
+
+def cache_paths(sample_count, target_size):
+    key = f"v{CACHE_VERSION}_{sample_count}_{target_size[0]}x{target_size[1]}"
+    return os.path.join(CACHE_DIR, f"{key}_x.npy"), os.path.join(CACHE_DIR, f"{key}_y.npy")
+
+
+def load_cached(sample_count, target_size):
+    """Memory-mapped (X, y) from the cache, or None if missing or unusable."""
+    x_path, y_path = cache_paths(sample_count, target_size)
+    try:
+        x_flat = np.load(x_path, mmap_mode="r")
+        y_train = np.load(y_path, mmap_mode="r")
+    except (OSError, ValueError):
+        return None
+    expected = (sample_count, target_size[0] * target_size[1])
+    if x_flat.shape != expected or x_flat.dtype != np.float32 or y_train.shape != (sample_count,):
+        return None
+    return x_flat, y_train
+
+
+def save_cached(x_flat, y_train, sample_count, target_size):
+    """Write the arrays atomically and drop cache files from older versions."""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    for path in glob.glob(os.path.join(CACHE_DIR, "v*_*.npy")):
+        if not os.path.basename(path).startswith(f"v{CACHE_VERSION}_"):
+            os.remove(path)
+    for path, array in zip(cache_paths(sample_count, target_size), (x_flat, y_train)):
+        tmp_path = path[:-len(".npy")] + ".tmp.npy"
+        np.save(tmp_path, array)
+        os.replace(tmp_path, path)
+
+
+def load_data(sample_count=2000, target_size=(20, 20), cache=True):
+    """Load MNIST, resize to target_size, flatten to vectors.
+
+    The float32 result is cached in CACHE_DIR under a key built from the
+    arguments, and later calls memory-map it instead of running TensorFlow.
+    """
+    if cache:
+        cached = load_cached(sample_count, target_size)
+        if cached is not None:
+            return cached
+
+    import tensorflow as tf
 
-def load_data(sample_count=2000, target_size=(20, 20)):
-    """Load MNIST, resize to target_size, flatten to vectors."""
     (x_train, y_train), _ = tf.keras.datasets.mnist.load_data()
     x_train = x_train.astype("float32") / 255.0
 
@@ -14,7 +85,10 @@ def load_data(sample_count=2000, target_size=(20, 20)):
     y_train = y_train[:sample_count]
 
     x_resized = tf.image.resize(x_train[..., np.newaxis], target_size).numpy()
-    x_flat = x_resized.reshape(sample_count, -1)
+    x_flat = x_resized.reshape(sample_count, -1).astype(np.float32)
+
+    if cache:
+        save_cached(x_flat, y_train, sample_count, target_size)
     return x_flat, y_train
 
 
@@ -44,10 +118,10 @@ def my_dense(a_in, W, b, g):
     return a_out
 
 
-def my_sequential(x, W1, b1, W2, b2, W3, b3):
-    a1 = my_dense(x, W1, b1, sigmoid)
-    a2 = my_dense(a1, W2, b2, sigmoid)
-    a3 = my_dense(a2, W3, b3, softmax)
+def my_sequential(x, W1, b1, W2, b2, W3, b3, dense=my_dense):
+    a1 = dense(x, W1, b1, sigmoid)
+    a2 = dense(a1, W2, b2, sigmoid)
+    a3 = dense(a2, W3, b3, softmax)
     return a3
 
 
@@ -56,53 +130,1119 @@ def my_dense_v(A_in, W, b, g):
     return g(z)
 
 
-def my_sequential_v(X, W1, b1, W2, b2, W3, b3):
-    A1 = my_dense_v(X, W1, b1, sigmoid)
-    A2 = my_dense_v(A1, W2, b2, sigmoid)
-    A3 = my_dense_v(A2, W3, b3, softmax_batch)
+def my_sequential_v(X, W1, b1, W2, b2, W3, b3, dense=my_dense_v):
+    A1 = dense(X, W1, b1, sigmoid)
+    A2 = dense(A1, W2, b2, sigmoid)
+    A3 = dense(A2, W3, b3, softmax_batch)
     return A3
 
 
-X, y = load_data()
-
-model = Sequential(
-    [
-        tf.keras.Input(shape=(400,)),
-        Dense(25, activation="sigmoid"),
-        Dense(15, activation="sigmoid"),
-        Dense(10, activation="softmax"),
-    ],
-    name="my_model",
-)
-
-model.compile(
-    loss=tf.keras.losses.SparseCategoricalCrossentropy(),
-    optimizer=tf.keras.optimizers.Adam(0.001),
-    metrics=["accuracy"],
-)
-
-model.fit(X, y, epochs=20)
-
-# Predict a single example
-prediction = model.predict(X[0].reshape(1, 400))
-print("Predicted digit:", int(np.argmax(prediction, axis=1)[0]))
-
-# Copy weights and validate NumPy forward pass
-layer1, layer2, layer3 = model.layers
-W1_tmp, b1_tmp = layer1.get_weights()
-W2_tmp, b2_tmp = layer2.get_weights()
-W3_tmp, b3_tmp = layer3.get_weights()
-
-numpy_pred = my_sequential(X[0], W1_tmp, b1_tmp, W2_tmp, b2_tmp, W3_tmp, b3_tmp)
-print("NumPy predicted digit:", int(np.argmax(numpy_pred)))
-
-# Vectorized NumPy predictions for the full batch
-numpy_preds = my_sequential_v(X, W1_tmp, b1_tmp, W2_tmp, b2_tmp, W3_tmp, b3_tmp)
-numpy_labels = np.argmax(numpy_preds, axis=1)
-print("NumPy accuracy:", np.mean(numpy_labels == y))
-
-# Optional visualization
-plt.imshow(X[0].reshape(20, 20), cmap="gray")
-plt.title(f"Label: {y[0]}, Pred: {np.argmax(prediction)}")
-plt.axis("off")
-plt.show()
+def sigmoid_(z):
+    """In-place sigmoid, as 0.5 * tanh(z / 2) + 0.5 so large |z| cannot overflow."""
+    z *= 0.5
+    np.tanh(z, out=z)
+    z *= 0.5
+    z += 0.5
+    return z
+
+
+def softmax_(z, row=None):
+    """In-place row-wise softmax of a 2-D batch.
+
+    row is an optional (n, 1) buffer for the row maxima and sums; with it
+    the call allocates nothing.
+    """
+    row = np.max(z, axis=1, keepdims=True, out=row)
+    z -= row
+    np.exp(z, out=z)
+    np.sum(z, axis=1, keepdims=True, out=row)
+    z /= row
+    return z
+
+
+def softmax_cross_entropy_(z, y, row=None, rows=None):
+    """Fused in-place softmax and mean sparse cross-entropy of a batch of logits.
+
+    Overwrites z with the softmax probabilities and returns the loss, taken
+    by log-sum-exp from the shifted logits (-log p_y = log sum exp(z - max)
+    - (z_y - max)) so it never evaluates log(0). row is an optional (n, 1)
+    buffer and rows an optional arange of at least n row indices.
+    """
+    n = len(z)
+    rows = np.arange(n) if rows is None else rows[:n]
+    row = np.max(z, axis=1, keepdims=True, out=row)
+    z -= row
+    picked = float(np.sum(z[rows, y]))
+    np.exp(z, out=z)
+    np.sum(z, axis=1, keepdims=True, out=row)
+    z /= row
+    np.log(row, out=row)
+    return (float(np.sum(row)) - picked) / n
+
+
+def relu_(z):
+    return np.maximum(z, 0, out=z)
+
+
+def linear_(z):
+    return z
+
+
+INPLACE_ACTIVATIONS = {
+    "sigmoid": sigmoid_,
+    "softmax": softmax_,
+    "relu": relu_,
+    "linear": linear_,
+}
+
+
+def keras_layers(model):
+    """(W, b, activation name) for every Dense layer of a Keras model."""
+    return [(*layer.get_weights(), layer.activation.__name__) for layer in model.layers]
+
+
+class InferenceEngine:
+    """Mini-batched forward pass over (W, b, activation) layers.
+
+    Weights are converted once to `dtype` and every layer writes into its own
+    preallocated batch buffer with in-place activations, so a forward pass
+    allocates nothing beyond the returned predictions.
+    """
+
+    def __init__(self, layers, batch_size=256, dtype=np.float32):
+        self.batch_size = batch_size
+        self.dtype = np.dtype(dtype)
+        self.layers = [
+            (np.ascontiguousarray(W, dtype=self.dtype), np.asarray(b, dtype=self.dtype),
+             INPLACE_ACTIVATIONS[activation])
+            for W, b, activation in layers
+        ]
+        self.buffers = [np.empty((batch_size, W.shape[1]), dtype=self.dtype) for W, _, _ in self.layers]
+        self.row = np.empty((batch_size, 1), dtype=self.dtype)
+
+    @property
+    def output_size(self):
+        return self.layers[-1][0].shape[1]
+
+    def forward(self, A, labels_only=False):
+        """Forward one batch of at most batch_size rows; returns a view of the last buffer.
+
+        With labels_only a final softmax is skipped: it preserves the order
+        within each row, so the logits have the same argmax.
+        """
+        n = len(A)
+        last = len(self.layers) - 1
+        for i, ((W, b, g), buffer) in enumerate(zip(self.layers, self.buffers)):
+            Z = buffer[:n]
+            np.matmul(A, W, out=Z)
+            Z += b
+            if g is not softmax_:
+                A = g(Z)
+            elif labels_only and i == last:
+                return Z
+            else:
+                A = softmax_(Z, self.row[:n])
+        return A
+
+    def predict(self, X, out=None):
+        """Output probabilities for all rows of X, computed batch by batch."""
+        if out is None:
+            out = np.empty((len(X), self.output_size), dtype=self.dtype)
+        for start in range(0, len(X), self.batch_size):
+            stop = start + self.batch_size
+            out[start:stop] = self.forward(X[start:stop])
+        return out
+
+    def predict_labels(self, X):
+        labels = np.empty(len(X), dtype=np.intp)
+        for start in range(0, len(X), self.batch_size):
+            stop = start + self.batch_size
+            np.argmax(self.forward(X[start:stop], labels_only=True), axis=1, out=labels[start:stop])
+        return labels
+
+
+def samples_per_second(fn, n, repeat=3):
+    """Best-of-`repeat` throughput of fn() processing n samples."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return n / best
+
+
+def benchmark_inference(X, layers, batch_sizes=(1, 32, 256, 2048), loop_samples=200):
+    """Print samples/sec of my_sequential, my_sequential_v and InferenceEngine."""
+    (W1, b1, _), (W2, b2, _), (W3, b3, _) = layers
+    X32 = X.astype(np.float32)
+
+    def loop():
+        for x in X[:loop_samples]:
+            my_sequential(x, W1, b1, W2, b2, W3, b3)
+
+    print(f"my_sequential:   {samples_per_second(loop, min(loop_samples, len(X))):>12,.0f} samples/sec")
+    rate = samples_per_second(lambda: my_sequential_v(X, W1, b1, W2, b2, W3, b3), len(X))
+    print(f"my_sequential_v: {rate:>12,.0f} samples/sec")
+    for batch_size in batch_sizes:
+        engine = InferenceEngine(layers, batch_size=batch_size)
+        rate = samples_per_second(lambda: engine.predict(X32), len(X))
+        print(f"engine (batch {batch_size:>5}): {rate:>12,.0f} samples/sec")
+
+
+def benchmark_kernels(n=65536, k=10, repeat=5, seed=0):
+    """Print time and peak allocation per batch of the legacy and fused kernels.
+
+    In-place kernels are timed including the copy that refills their input,
+    so their numbers are an upper bound.
+    """
+    rng = np.random.default_rng(seed)
+    Z = (rng.standard_normal((n, k)) * 5).astype(np.float32)
+    y = rng.integers(0, k, n)
+    rows = np.arange(n)
+    work = np.empty_like(Z)
+    row = np.empty((n, 1), dtype=Z.dtype)
+
+    def refill(kernel):
+        def run():
+            np.copyto(work, Z)
+            return kernel(work)
+        return run
+
+    cases = (
+        ("sigmoid", lambda: sigmoid(Z), refill(sigmoid_)),
+        ("softmax", lambda: softmax_batch(Z), refill(lambda z: softmax_(z, row))),
+        ("cross-entropy", lambda: -np.mean(np.log(np.maximum(softmax_batch(Z)[rows, y], 1e-7))),
+         refill(lambda z: softmax_cross_entropy_(z, y, row, rows))),
+        ("labels", lambda: np.argmax(softmax_batch(Z), axis=1), lambda: np.argmax(Z, axis=1)),
+    )
+
+    def measure(fn):
+        fn()
+        tracemalloc.start()
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - start)
+        return best, peak
+
+    print(f"{n:,} x {k} float32 batch ({Z.nbytes / 1024:,.0f} KB)")
+    print(f"{'kernel':<15}{'legacy ms':>11}{'fused ms':>10}{'legacy KB':>11}{'fused KB':>10}")
+    for label, legacy, fused in cases:
+        legacy_seconds, legacy_peak = measure(legacy)
+        fused_seconds, fused_peak = measure(fused)
+        print(f"{label:<15}{legacy_seconds * 1000:>11.2f}{fused_seconds * 1000:>10.2f}"
+              f"{legacy_peak / 1024:>11,.0f}{fused_peak / 1024:>10,.0f}")
+
+
+INT8_MAX = 127
+# float32 represents every integer up to 2**24 exactly, so int8 x int8 dot
+# products of up to this many terms can run through float32 BLAS bit-exactly
+EXACT_FLOAT32_TERMS = 2 ** 24 // (INT8_MAX * INT8_MAX)
+# The sigmoid lookup tables cover |z| <= SIGMOID_RANGE in steps of about
+# SIGMOID_STEP; beyond that the int8 output is saturated anyway
+SIGMOID_RANGE = 8.0
+SIGMOID_STEP = 1 / 32
+
+
+def quantize(array, scale):
+    return np.clip(np.rint(np.asarray(array) / scale), -INT8_MAX, INT8_MAX).astype(np.int8)
+
+
+class QuantizedEngine:
+    """Post-training int8 version of a sigmoid/.../softmax InferenceEngine.
+
+    Each layer's weights get one symmetric scale, activations are int8 with a
+    fixed 1/127 scale (sigmoid outputs lie in (0, 1)), and the matmul
+    accumulates in int32 with the bias pre-scaled into the same units. The
+    sigmoid is a lookup table indexed by the rescaled accumulator, so hidden
+    layers never leave integer arithmetic; the last layer's accumulator is
+    already ordered like its softmax, so labels are its argmax.
+
+    NumPy has no integer BLAS, so layers whose accumulators stay below 2**24
+    keep float32 copies of their int8 weights and bias, built once here, and
+    run through float32 matmul with bit-exact integer results. Like
+    InferenceEngine, every layer writes into preallocated batch buffers, so
+    a forward pass allocates nothing. It is still slower than float32 (about
+    0.6-0.7x on 400-25-15-10): it runs the same float32 matmuls and adds
+    rounding the input and a table lookup per hidden layer. Its gain is the
+    4x smaller weights (`nbytes`, which excludes the float32 working copies).
+    """
+
+    def __init__(self, layers, calibration_X, batch_size=256):
+        *hidden, last = layers
+        if any(activation != "sigmoid" for _, _, activation in hidden) or \
+                last[2] not in ("softmax", "linear"):
+            raise ValueError("QuantizedEngine supports sigmoid hidden layers and a softmax/linear output")
+
+        self.batch_size = batch_size
+        self.input_scale = float(np.max(np.abs(calibration_X))) / INT8_MAX or 1.0
+        self.layers = []
+        input_scale = self.input_scale
+        for W, b, activation in layers:
+            weight_scale = float(np.max(np.abs(W))) / INT8_MAX or 1.0
+            accumulator_scale = input_scale * weight_scale
+            bias = np.rint(np.asarray(b) / accumulator_scale).astype(np.int32)
+            lut = None
+            if activation == "sigmoid":
+                lut = self.sigmoid_table(accumulator_scale)
+            self.layers.append((quantize(W, weight_scale), bias, lut))
+            input_scale = 1 / INT8_MAX
+
+        # Per layer: weights, bias and accumulator buffer in the dtype its
+        # matmul runs in, then (for sigmoid layers) the folded table offset,
+        # divisor and an index buffer (intp, which np.take reads without converting)
+        self.steps = []
+        for W, bias, _ in self.layers:
+            exact = W.shape[0] * INT8_MAX * INT8_MAX + int(np.max(np.abs(bias), initial=0)) <= 2 ** 24
+            dtype = np.float32 if exact else np.int32
+            self.steps.append((W.astype(np.float32) if exact else W, bias.astype(dtype),
+                               np.empty((batch_size, W.shape[1]), dtype=dtype)))
+        # Each input or table output is stored in the dtype the next matmul reads
+        dtypes = [np.float32 if Z.dtype == np.float32 else np.int8 for _, _, Z in self.steps]
+        self.inputs = [np.empty((batch_size, W.shape[0]), dtype=dtype)
+                       for (W, _, _), dtype in zip(self.layers, dtypes)]
+        # Inputs are rounded in float32, straight into the first matmul's buffer when it reads float32
+        self.scaled = self.inputs[0] if dtypes[0] == np.float32 else \
+            np.empty((batch_size, self.layers[0][0].shape[0]), dtype=np.float32)
+        self.tables = []
+        for (W, _, lut), dtype in zip(self.layers[:-1], dtypes[1:]):
+            divisor, offset, table = lut
+            self.tables.append((divisor // 2 + offset * divisor, divisor, table.astype(dtype),
+                                np.empty((batch_size, W.shape[1]), dtype=np.intp)))
+
+    @staticmethod
+    def sigmoid_table(accumulator_scale):
+        """(divisor, offset, int8 table) mapping an int32 accumulator to int8 sigmoid."""
+        divisor = max(1, int(round(SIGMOID_STEP / accumulator_scale)))
+        offset = int(np.ceil(SIGMOID_RANGE / (divisor * accumulator_scale)))
+        z = (np.arange(2 * offset + 1) - offset) * divisor * accumulator_scale
+        table = np.rint(INT8_MAX / (1 + np.exp(-z))).astype(np.int8)
+        return divisor, offset, table
+
+    @property
+    def nbytes(self):
+        total = 0
+        for W, b, lut in self.layers:
+            total += W.nbytes + b.nbytes + (lut[2].nbytes if lut else 0)
+        return total
+
+    def forward(self, X):
+        """Output-layer accumulators for one batch of at most batch_size rows.
+
+        Returns a view of the last buffer: exact integers, held as float32
+        when that layer ran through float32 matmul.
+        """
+        n = len(X)
+        scaled = self.scaled[:n]
+        np.divide(X, self.input_scale, out=scaled)
+        np.rint(scaled, out=scaled)
+        np.clip(scaled, -INT8_MAX, INT8_MAX, out=scaled)
+        A = self.inputs[0][:n]
+        if self.scaled is not self.inputs[0]:
+            np.copyto(A, scaled, casting="unsafe")
+        for i, (W, b, Z) in enumerate(self.steps):
+            Z = Z[:n]
+            if Z.dtype == np.float32:
+                np.matmul(A, W, out=Z)
+            else:
+                np.matmul(A, W, out=Z, dtype=np.int32)
+            Z += b
+            if i == len(self.tables):
+                return Z
+            shift, divisor, table, index = self.tables[i]
+            index = index[:n]
+            # Round to the nearest table entry; take clamps to the saturated ends
+            np.copyto(index, Z, casting="unsafe")
+            index += shift
+            np.floor_divide(index, divisor, out=index)
+            A = self.inputs[i + 1][:n]
+            np.take(table, index, out=A, mode="clip")
+
+    def predict_labels(self, X):
+        labels = np.empty(len(X), dtype=np.intp)
+        for start in range(0, len(X), self.batch_size):
+            stop = start + self.batch_size
+            np.argmax(self.forward(X[start:stop]), axis=1, out=labels[start:stop])
+        return labels
+
+
+def quantization_report(layers, X, y):
+    """Print footprint, samples/sec and accuracy of the float32 and int8 paths."""
+    X = np.asarray(X, dtype=np.float32)
+    engine = InferenceEngine(layers)
+    quantized = QuantizedEngine(layers, X)
+    float_bytes = sum(W.nbytes + b.nbytes for W, b, _ in engine.layers)
+    float_accuracy = np.mean(engine.predict_labels(X) == y)
+    int8_accuracy = np.mean(quantized.predict_labels(X) == y)
+
+    print(f"{'path':<8}{'weights':>10}{'samples/sec':>14}{'accuracy':>10}")
+    for label, model, nbytes, accuracy in (("float32", engine, float_bytes, float_accuracy),
+                                           ("int8", quantized, quantized.nbytes, int8_accuracy)):
+        rate = samples_per_second(lambda: model.predict_labels(X), len(X))
+        print(f"{label:<8}{nbytes / 1024:>8.1f}KB{rate:>14,.0f}{accuracy:>10.4f}")
+    print(f"Accuracy delta (int8 - float): {int8_accuracy - float_accuracy:+.4f}")
+    print("int8 runs the same float32 matmuls plus input rounding and sigmoid lookups, "
+          "so it trades speed for 4x smaller weights")
+
+
+class NumpyTrainer:
+    """Mini-batch Adam training of a sigmoid/.../softmax network in NumPy.
+
+    Mirrors the Keras setup in build_model (Glorot-uniform weights, zero
+    biases, sparse categorical cross-entropy, Adam with Keras defaults) so
+    the model can be retrained without TensorFlow. Activations, deltas,
+    gradients and Adam moments all live in buffers allocated once, and the
+    forward pass uses the in-place activations shared with InferenceEngine.
+    """
+
+    def __init__(self, sizes=(400, 25, 15, 10), learning_rate=0.001, batch_size=32,
+                 beta_1=0.9, beta_2=0.999, epsilon=1e-7, seed=0, dtype=np.float32):
+        self.rng = np.random.default_rng(seed)
+        self.batch_size = batch_size
+        self.learning_rate = learning_rate
+        self.beta_1, self.beta_2, self.epsilon = beta_1, beta_2, epsilon
+        self.dtype = np.dtype(dtype)
+        self.steps = 0
+
+        self.params = []
+        for fan_in, fan_out in zip(sizes[:-1], sizes[1:]):
+            limit = np.sqrt(6 / (fan_in + fan_out))
+            W = self.rng.uniform(-limit, limit, size=(fan_in, fan_out)).astype(self.dtype)
+            self.params += [W, np.zeros(fan_out, dtype=self.dtype)]
+        self.activations = ["sigmoid"] * (len(sizes) - 2) + ["softmax"]
+
+        def buffers(shapes):
+            return [np.zeros(shape, dtype=self.dtype) for shape in shapes]
+
+        self.X_batch = np.empty((batch_size, sizes[0]), dtype=self.dtype)
+        self.y_batch = np.empty(batch_size, dtype=np.intp)
+        self.rows = np.arange(batch_size)
+        self.row = np.empty((batch_size, 1), dtype=self.dtype)
+        self.A = buffers((batch_size, units) for units in sizes[1:])
+        self.delta = buffers((batch_size, units) for units in sizes[1:-1])
+        self.scratch = buffers((batch_size, units) for units in sizes[1:-1])
+        self.grads = buffers(param.shape for param in self.params)
+        self.m = buffers(param.shape for param in self.params)
+        self.v = buffers(param.shape for param in self.params)
+        self.update = buffers(param.shape for param in self.params)
+
+    def layers(self):
+        """(W, b, activation) layers for InferenceEngine or save_weights."""
+        return [(self.params[2 * i], self.params[2 * i + 1], activation)
+                for i, activation in enumerate(self.activations)]
+
+    def forward(self, X, logits=False):
+        """Forward one batch; with logits the final softmax is left for backward."""
+        A = X
+        last = len(self.activations) - 1
+        for i, ((W, b, activation), out) in enumerate(zip(self.layers(), self.A)):
+            Z = out[:len(X)]
+            np.matmul(A, W, out=Z)
+            Z += b
+            if logits and i == last:
+                return Z
+            A = INPLACE_ACTIVATIONS[activation](Z)
+        return A
+
+    def backward(self, X, y):
+        """Fill self.grads for one batch run through forward(X, logits=True).
+
+        Returns the batch's mean cross-entropy.
+        """
+        n = len(X)
+        rows = self.rows[:n]
+        delta = self.A[-1][:n]
+        loss = softmax_cross_entropy_(delta, y, self.row[:n], rows)
+
+        # softmax + sparse cross-entropy: dL/dZ = (P - onehot(y)) / n, in place
+        delta[rows, y] -= 1
+        delta /= n
+        for i in range(len(self.activations) - 1, -1, -1):
+            A_prev = X if i == 0 else self.A[i - 1][:n]
+            np.matmul(A_prev.T, delta, out=self.grads[2 * i])
+            np.sum(delta, axis=0, out=self.grads[2 * i + 1])
+            if i == 0:
+                break
+            # Back through the sigmoid: delta_prev = (delta @ W.T) * A * (1 - A)
+            delta_prev = self.delta[i - 1][:n]
+            np.matmul(delta, self.params[2 * i].T, out=delta_prev)
+            delta_prev *= A_prev
+            scratch = self.scratch[i - 1][:n]
+            np.subtract(1, A_prev, out=scratch)
+            delta_prev *= scratch
+            delta = delta_prev
+        return loss
+
+    def adam_step(self):
+        self.steps += 1
+        step_size = self.learning_rate * np.sqrt(1 - self.beta_2 ** self.steps) / (1 - self.beta_1 ** self.steps)
+        for param, grad, m, v, update in zip(self.params, self.grads, self.m, self.v, self.update):
+            m *= self.beta_1
+            m += (1 - self.beta_1) * grad
+            v *= self.beta_2
+            np.square(grad, out=update)
+            update *= 1 - self.beta_2
+            v += update
+            np.sqrt(v, out=update)
+            update += self.epsilon
+            np.divide(m, update, out=update)
+            update *= step_size
+            param -= update
+
+    def fit_epoch(self, X, y):
+        """One shuffled pass over (X, y); returns the mean batch loss."""
+        order = self.rng.permutation(len(X))
+        losses = []
+        for start in range(0, len(X), self.batch_size):
+            index = order[start:start + self.batch_size]
+            X_batch = self.X_batch[:len(index)]
+            y_batch = self.y_batch[:len(index)]
+            np.take(X, index, axis=0, out=X_batch)
+            np.take(y, index, out=y_batch)
+            self.forward(X_batch, logits=True)
+            losses.append(self.backward(X_batch, y_batch))
+            self.adam_step()
+        return float(np.mean(losses))
+
+    def accuracy(self, X, y):
+        return float(np.mean(InferenceEngine(self.layers()).predict_labels(X) == y))
+
+    def fit(self, X, y, epochs=20, verbose=True):
+        X = np.asarray(X, dtype=self.dtype)
+        y = np.asarray(y, dtype=np.intp)
+        for epoch in range(1, epochs + 1):
+            loss = self.fit_epoch(X, y)
+            if verbose:
+                print(f"Epoch {epoch}/{epochs} - loss: {loss:.4f} - accuracy: {self.accuracy(X, y):.4f}")
+        return self
+
+
+def time_to_accuracy(fit_epoch, evaluate, target, max_epochs):
+    """Seconds of training until evaluate() >= target, or None if never reached."""
+    elapsed = 0.0
+    for epoch in range(1, max_epochs + 1):
+        start = time.perf_counter()
+        fit_epoch()
+        elapsed += time.perf_counter() - start
+        if evaluate() >= target:
+            return elapsed, epoch
+    return None, max_epochs
+
+
+def benchmark_training(X, y, target=0.9, max_epochs=20):
+    """Compare time-to-accuracy of NumpyTrainer and Keras model.fit on (X, y)."""
+    X = np.asarray(X, dtype=np.float32)
+    y = np.asarray(y)
+
+    start = time.perf_counter()
+    trainer = NumpyTrainer()
+    setup = time.perf_counter() - start
+    seconds, epochs = time_to_accuracy(lambda: trainer.fit_epoch(X, y),
+                                       lambda: trainer.accuracy(X, y), target, max_epochs)
+    results = {"numpy": (setup, seconds, epochs)}
+
+    start = time.perf_counter()
+    model = build_model()
+    setup = time.perf_counter() - start
+    seconds, epochs = time_to_accuracy(
+        lambda: model.fit(X, y, epochs=1, verbose=0),
+        lambda: float(np.mean(InferenceEngine(keras_layers(model)).predict_labels(X) == y)),
+        target, max_epochs)
+    results["keras"] = (setup, seconds, epochs)
+
+    print(f"Time to {target:.0%} training accuracy:")
+    for label, (setup, seconds, epochs) in results.items():
+        reached = f"{seconds:.2f}s over {epochs} epochs" if seconds is not None else f"not reached in {epochs} epochs"
+        print(f"  {label:<6} setup {setup:.2f}s, training {reached}")
+    return results
+
+
+class LayerProfiler:
+    """Per-layer wall time, bytes allocated and FLOPs for wrapped dense functions.
+
+    wrap(my_dense_v) returns a drop-in replacement to pass as the `dense`
+    argument of my_sequential / my_sequential_v. Layers are keyed by their
+    weight shape. Allocation counts come from tracemalloc, which NumPy
+    reports its buffers to, so keep profiled runs apart from timed ones.
+    """
+
+    def __init__(self):
+        self.layers = {}
+
+    def wrap(self, dense):
+        def profiled(A_in, W, b, g):
+            rows = 1 if np.ndim(A_in) == 1 else len(A_in)
+            tracing = tracemalloc.is_tracing()
+            if tracing:
+                tracemalloc.reset_peak()
+                before, _ = tracemalloc.get_traced_memory()
+            start = time.perf_counter()
+            out = dense(A_in, W, b, g)
+            seconds = time.perf_counter() - start
+            allocated = tracemalloc.get_traced_memory()[1] - before if tracing else 0
+
+            stats = self.layers.setdefault(f"dense {W.shape[0]}x{W.shape[1]}",
+                                           {"calls": 0, "seconds": 0.0, "bytes": 0, "flops": 0})
+            stats["calls"] += 1
+            stats["seconds"] += seconds
+            stats["bytes"] += allocated
+            # A multiply and an add per weight, plus the bias add
+            stats["flops"] += rows * (2 * W.shape[0] + 1) * W.shape[1]
+            return out
+        return profiled
+
+    def report(self):
+        return [{"layer": name, **stats} for name, stats in self.layers.items()]
+
+
+def profile_path(run, dense):
+    """Run run(wrapped_dense) once under tracemalloc and return its layer stats."""
+    profiler = LayerProfiler()
+    tracemalloc.start()
+    try:
+        run(profiler.wrap(dense))
+    finally:
+        tracemalloc.stop()
+    return profiler.report()
+
+
+def run_benchmarks(layers, X, batch_sizes=(1, 32, 256, 2048), model=None, loop_samples=200):
+    """Benchmark every forward path over several batch sizes as a JSON-ready report.
+
+    my_sequential is per-sample, so it is measured once over loop_samples
+    rows. model.predict is included when a Keras model is given; it has no
+    per-layer hooks and reports totals only.
+    """
+    X = np.asarray(X, dtype=np.float32)
+    (W1, b1, _), (W2, b2, _), (W3, b3, _) = layers
+    weights = (W1, b1, W2, b2, W3, b3)
+    results = []
+
+    def loop(samples, dense=my_dense):
+        for x in samples:
+            my_sequential(x, *weights, dense=dense)
+
+    samples = X[:loop_samples]
+    results.append({
+        "path": "my_sequential", "batch_size": 1,
+        "samples_per_sec": samples_per_second(lambda: loop(samples), len(samples)),
+        "layers": profile_path(lambda dense: loop(samples[:10], dense), my_dense),
+    })
+
+    for batch_size in batch_sizes:
+        batches = [X[start:start + batch_size] for start in range(0, len(X), batch_size)]
+
+        def vectorized(dense=my_dense_v):
+            for batch in batches:
+                my_sequential_v(batch, *weights, dense=dense)
+
+        results.append({
+            "path": "my_sequential_v", "batch_size": batch_size,
+            "samples_per_sec": samples_per_second(vectorized, len(X)),
+            "layers": profile_path(lambda dense: my_sequential_v(batches[0], *weights, dense=dense),
+                                   my_dense_v),
+        })
+
+        engine = InferenceEngine(layers, batch_size=batch_size)
+        results.append({
+            "path": "engine", "batch_size": batch_size,
+            "samples_per_sec": samples_per_second(lambda: engine.predict(X), len(X)),
+        })
+
+        if model is not None:
+            model.predict(X[:batch_size], verbose=0)  # build the predict function first
+            results.append({
+                "path": "model.predict", "batch_size": batch_size,
+                "samples_per_sec": samples_per_second(
+                    lambda: model.predict(X, batch_size=batch_size, verbose=0), len(X)),
+            })
+
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "samples": len(X),
+        "results": results,
+    }
+
+
+def check_regressions(report, baseline, tolerance=0.2):
+    """Paths whose samples/sec fell more than `tolerance` below the baseline report."""
+    expected = {(r["path"], r["batch_size"]): r["samples_per_sec"] for r in baseline["results"]}
+    failures = []
+    for result in report["results"]:
+        key = (result["path"], result["batch_size"])
+        if key in expected and result["samples_per_sec"] < expected[key] * (1 - tolerance):
+            failures.append(f"{key[0]} (batch {key[1]}): {result['samples_per_sec']:,.0f} samples/sec, "
+                            f"baseline {expected[key]:,.0f}")
+    return failures
+
+
+def print_benchmarks(report):
+    for result in report["results"]:
+        print(f"{result['path']:<16} batch {result['batch_size']:>5}: {result['samples_per_sec']:>12,.0f} samples/sec")
+        for layer in result.get("layers", []):
+            print(f"    {layer['layer']:<14} {layer['seconds'] * 1000:>9.3f} ms "
+                  f"{layer['bytes'] / 1024:>9.1f} KB {layer['flops'] / 1e6:>9.2f} MFLOP")
+
+
+def keras_model(layers):
+    """A compiled Keras model carrying the given layers' weights."""
+    model = build_model()
+    model.set_weights([array for W, b, _ in layers for array in (W, b)])
+    return model
+
+
+WEIGHTS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mnist_weights.npz")
+
+
+def save_weights(layers, path=WEIGHTS_FILE):
+    """Save (W, b, activation) layers as W1, b1, ... plus their activation names."""
+    arrays = {}
+    for i, (W, b, _) in enumerate(layers, start=1):
+        arrays[f"W{i}"] = W
+        arrays[f"b{i}"] = b
+    np.savez(path, activations=np.array([activation for _, _, activation in layers]), **arrays)
+
+
+def load_weights(path=WEIGHTS_FILE):
+    """Load layers saved by save_weights; needs NumPy only."""
+    with np.load(path) as data:
+        activations = [str(activation) for activation in data["activations"]]
+        return [(data[f"W{i}"], data[f"b{i}"], activation)
+                for i, activation in enumerate(activations, start=1)]
+
+
+def build_model():
+    import tensorflow as tf
+    from tensorflow.keras.layers import Dense
+    from tensorflow.keras.models import Sequential
+
+    model = Sequential(
+        [
+            tf.keras.Input(shape=(400,)),
+            Dense(25, activation="sigmoid"),
+            Dense(15, activation="sigmoid"),
+            Dense(10, activation="softmax"),
+        ],
+        name="my_model",
+    )
+
+    model.compile(
+        loss=tf.keras.losses.SparseCategoricalCrossentropy(),
+        optimizer=tf.keras.optimizers.Adam(0.001),
+        metrics=["accuracy"],
+    )
+    return model
+
+
+def train(epochs=20, weights_path=WEIGHTS_FILE, plot=True, benchmark=True):
+    X, y = load_data()
+
+    model = build_model()
+    model.fit(X, y, epochs=epochs)
+
+    # Predict a single example
+    prediction = model.predict(X[0].reshape(1, 400))
+    print("Predicted digit:", int(np.argmax(prediction, axis=1)[0]))
+
+    # Copy weights and validate NumPy forward pass
+    layer1, layer2, layer3 = model.layers
+    W1_tmp, b1_tmp = layer1.get_weights()
+    W2_tmp, b2_tmp = layer2.get_weights()
+    W3_tmp, b3_tmp = layer3.get_weights()
+
+    numpy_pred = my_sequential(X[0], W1_tmp, b1_tmp, W2_tmp, b2_tmp, W3_tmp, b3_tmp)
+    print("NumPy predicted digit:", int(np.argmax(numpy_pred)))
+
+    # Vectorized NumPy predictions for the full batch
+    numpy_preds = my_sequential_v(X, W1_tmp, b1_tmp, W2_tmp, b2_tmp, W3_tmp, b3_tmp)
+    numpy_labels = np.argmax(numpy_preds, axis=1)
+    print("NumPy accuracy:", np.mean(numpy_labels == y))
+
+    # Batched float32 engine over the same weights
+    layers = keras_layers(model)
+    engine = InferenceEngine(layers)
+    print("Engine accuracy:", np.mean(engine.predict_labels(X) == y))
+    if benchmark:
+        benchmark_inference(X, layers)
+        quantization_report(layers, X, y)
+
+    save_weights(layers, weights_path)
+    print(f"Weights saved to {weights_path}")
+
+    # Optional visualization
+    if plot:
+        import matplotlib.pyplot as plt
+
+        plt.imshow(X[0].reshape(20, 20), cmap="gray")
+        plt.title(f"Label: {y[0]}, Pred: {np.argmax(prediction)}")
+        plt.axis("off")
+        plt.show()
+
+
+def read_images(path):
+    """Images as an (n, features) array from a .npy file (memory-mapped) or an .npz with X."""
+    if path.endswith(".npz"):
+        with np.load(path) as data:
+            return data["X"], data["y"] if "y" in data else None
+    return np.load(path, mmap_mode="r"), None
+
+
+def predict(weights_path=WEIGHTS_FILE, images_path=None, labels_path=None, batch_size=256):
+    """Classify a batch with NumPy only and print the labels (and accuracy if known)."""
+    engine = InferenceEngine(load_weights(weights_path), batch_size=batch_size)
+    if images_path is None:
+        # Falls back to the cached training set, which needs no TensorFlow once built
+        X, y = load_data()
+    else:
+        X, y = read_images(images_path)
+    if labels_path is not None:
+        y = np.load(labels_path)
+
+    labels = engine.predict_labels(X)
+    print("Predicted digits:", " ".join(map(str, labels[:20])) + (" ..." if len(labels) > 20 else ""))
+    if y is not None:
+        print("Accuracy:", np.mean(labels == y))
+    return labels
+
+
+def npy_shape(path):
+    """(shape, dtype, header size) of a C-ordered .npy file, read from its header only."""
+    with open(path, "rb") as f:
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+        else:
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+        if fortran_order:
+            raise ValueError(f"{path} is Fortran-ordered; save it with np.save in C order")
+        return shape, dtype, f.tell()
+
+
+def iter_npy_chunks(path, chunk_size):
+    """Read a 2-D .npy file in chunks of rows into one reused buffer.
+
+    Plain reads are used instead of a memmap so pages of a huge file do not
+    pile up in the resident set; each yielded chunk is overwritten by the next.
+    """
+    shape, dtype, offset = npy_shape(path)
+    if len(shape) != 2:
+        raise ValueError(f"{path} must hold a 2-D (samples, features) array, got shape {shape}")
+    buffer = np.empty((chunk_size, shape[1]), dtype=dtype)
+    row_bytes = shape[1] * dtype.itemsize
+    with open(path, "rb") as f:
+        f.seek(offset)
+        for start in range(0, shape[0], chunk_size):
+            rows = min(chunk_size, shape[0] - start)
+            view = memoryview(buffer).cast("B")[:rows * row_bytes]
+            if f.readinto(view) != len(view):
+                raise ValueError(f"{path} is truncated")
+            yield buffer[:rows]
+
+
+def stream_predict(engine, chunks, write):
+    """Label every row of an iterable of image chunks, passing each chunk's labels to write().
+
+    Only one chunk and its labels are held at a time, so memory stays flat
+    however many images the iterable yields. Returns (samples, seconds).
+    """
+    total = 0
+    start = time.perf_counter()
+    for chunk in chunks:
+        labels = engine.predict_labels(np.asarray(chunk, dtype=engine.dtype))
+        write(total, labels)
+        total += len(labels)
+    return total, time.perf_counter() - start
+
+
+def stream_predict_file(weights_path, images_path, output_path=None, chunk_size=8192,
+                        batch_size=256):
+    """Stream a (n, 400) .npy file through the engine, writing labels as they are computed.
+
+    A .npy output gets its header for the final size up front and then each
+    chunk's labels appended as uint8 bytes, so written labels do not stay
+    resident the way dirty pages of a memory map would; any other output (or
+    stdout when None) gets one label per line.
+    """
+    engine = InferenceEngine(load_weights(weights_path), batch_size=batch_size)
+    (samples, _), _, _ = npy_shape(images_path)
+    chunks = iter_npy_chunks(images_path, chunk_size)
+
+    if output_path is not None and output_path.endswith(".npy"):
+        with open(output_path, "wb") as f:
+            np.lib.format.write_array_header_1_0(
+                f, {"descr": np.lib.format.dtype_to_descr(np.dtype(np.uint8)),
+                    "fortran_order": False, "shape": (samples,)})
+            total, elapsed = stream_predict(
+                engine, chunks, lambda offset, labels: f.write(labels.astype(np.uint8).tobytes()))
+    else:
+        f = sys.stdout if output_path is None else open(output_path, "w")
+        try:
+            total, elapsed = stream_predict(
+                engine, chunks, lambda offset, labels: f.write("".join(f"{label}\n" for label in labels)))
+        finally:
+            if f is not sys.stdout:
+                f.close()
+
+    # Keep the report off stdout when the labels themselves go there
+    report = sys.stderr if output_path is None else sys.stdout
+    print(f"Predicted {total} samples in {elapsed:.2f}s ({total / max(elapsed, 1e-9):,.0f} samples/sec)",
+          file=report)
+    peak = peak_rss_mb()
+    if peak is not None:
+        print(f"Peak RSS: {peak:.1f} MB", file=report)
+    return total
+
+
+def share_array(shape, dtype):
+    """A new SharedMemory block and an ndarray view over it."""
+    dtype = np.dtype(dtype)
+    shm = shared_memory.SharedMemory(create=True, size=max(1, int(np.prod(shape)) * dtype.itemsize))
+    return shm, np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+
+def attach_array(spec):
+    """Attach to a block described by (name, shape, dtype) without copying."""
+    name, shape, dtype = spec
+    try:
+        # The creating process owns the block; keep workers from tracking it
+        shm = shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:  # Python < 3.13
+        shm = shared_memory.SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+
+# Per-process state set up by _init_worker
+_worker = {}
+
+
+def _init_worker(layer_specs, activations, input_spec, output_spec, batch_size):
+    blocks, arrays = [], []
+    for spec in [*layer_specs, input_spec, output_spec]:
+        shm, array = attach_array(spec)
+        blocks.append(shm)
+        arrays.append(array)
+    weights = arrays[:-2]
+    layers = [(weights[2 * i], weights[2 * i + 1], activation)
+              for i, activation in enumerate(activations)]
+    _worker.update(blocks=blocks, X=arrays[-2], out=arrays[-1],
+                   engine=InferenceEngine(layers, batch_size=batch_size))
+
+
+def _score_shard(bounds):
+    start, stop = bounds
+    _worker["out"][start:stop] = _worker["engine"].predict_labels(_worker["X"][start:stop])
+    return stop - start
+
+
+class ParallelScorer:
+    """Scores batches across a process pool over shared-memory weights and buffers.
+
+    Weights, the input rows and the output labels live in SharedMemory blocks
+    that every worker maps once at start-up; tasks only carry (start, stop)
+    row bounds, so no arrays are pickled. Fill `X[:n]` directly (or pass an
+    array to predict_labels) and read the labels back from the return value.
+    """
+
+    def __init__(self, layers, workers, capacity, batch_size=256, shards_per_worker=4):
+        self.workers = workers
+        self.shards_per_worker = shards_per_worker
+        self.blocks = []
+        layer_specs = []
+        for W, b, _ in layers:
+            for array in (W, b):
+                shm, view = share_array(np.shape(array), np.float32)
+                view[...] = array
+                self.blocks.append(shm)
+                layer_specs.append((shm.name, view.shape, view.dtype))
+
+        features = np.shape(layers[0][0])[0]
+        shm, self.X = share_array((capacity, features), np.float32)
+        self.blocks.append(shm)
+        input_spec = (shm.name, self.X.shape, self.X.dtype)
+        shm, self.out = share_array((capacity,), np.intp)
+        self.blocks.append(shm)
+        output_spec = (shm.name, self.out.shape, self.out.dtype)
+
+        self.pool = ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker,
+            initargs=(layer_specs, [activation for _, _, activation in layers],
+                      input_spec, output_spec, batch_size),
+        )
+
+    def run(self, n):
+        """Score rows X[:n] in parallel; returns a view of their labels."""
+        shard = max(1, -(-n // (self.workers * self.shards_per_worker)))
+        bounds = [(start, min(start + shard, n)) for start in range(0, n, shard)]
+        for _ in self.pool.map(_score_shard, bounds):
+            pass
+        return self.out[:n]
+
+    def predict_labels(self, X):
+        if len(X) > len(self.X):
+            raise ValueError(f"batch of {len(X)} rows exceeds capacity {len(self.X)}")
+        self.X[:len(X)] = X
+        return self.run(len(X)).copy()
+
+    def close(self):
+        self.pool.shutdown()
+        # Drop our views before closing the blocks they point into
+        self.X = self.out = None
+        for shm in self.blocks:
+            shm.close()
+            shm.unlink()
+        self.blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def benchmark_scaling(layers, X, max_workers=None, batch_size=256, repeat=3):
+    """Print samples/sec and scaling efficiency for 1..max_workers processes."""
+    max_workers = max_workers or os.cpu_count()
+    counts = sorted({1, max_workers, *(2 ** i for i in range(max_workers.bit_length()) if 2 ** i <= max_workers)})
+    base = None
+    print(f"{'workers':>8}{'samples/sec':>16}{'efficiency':>12}")
+    for workers in counts:
+        with ParallelScorer(layers, workers, len(X), batch_size) as scorer:
+            scorer.X[:] = X
+            scorer.run(len(X))  # start every worker before timing
+            rate = samples_per_second(lambda: scorer.run(len(X)), len(X), repeat)
+        base = base or rate
+        print(f"{workers:>8}{rate:>16,.0f}{rate / (workers * base):>12.0%}")
+
+
+def measure_import_time(repeat=3):
+    """Best-of-`repeat` wall time to import this module vs. its heavy dependencies."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    module = os.path.splitext(os.path.basename(__file__))[0]
+    statements = {
+        module: f"import {module}",
+        "tensorflow + matplotlib": "import tensorflow, matplotlib.pyplot",
+    }
+    for label, statement in statements.items():
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = subprocess.run([sys.executable, "-c", statement], cwd=here,
+                                    capture_output=True)
+            best = min(best, time.perf_counter() - start)
+        status = "" if result.returncode == 0 else " (failed: not installed?)"
+        print(f"import {label}: {best * 1000:.0f} ms{status}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="MNIST 0-9 with Keras and NumPy forward passes")
+    subparsers = parser.add_subparsers(dest="command")
+
+    train_parser = subparsers.add_parser("train", help="train with Keras and save the weights (default)")
+    train_parser.add_argument("--epochs", type=int, default=20)
+    train_parser.add_argument("--weights", default=WEIGHTS_FILE, help="where to save W1..b3")
+    train_parser.add_argument("--no-plot", action="store_true", help="skip the matplotlib preview")
+    train_parser.add_argument("--no-benchmark", action="store_true", help="skip the inference benchmark")
+
+    predict_parser = subparsers.add_parser("predict", help="classify images with NumPy only")
+    predict_parser.add_argument("--weights", default=WEIGHTS_FILE)
+    predict_parser.add_argument("--images", help=".npy of (n, 400) images or .npz with X (and y)")
+    predict_parser.add_argument("--labels", help="optional .npy of true labels")
+    predict_parser.add_argument("--batch-size", type=int, default=256)
+
+    stream_parser = subparsers.add_parser("stream", help="stream a large .npy of images through the model")
+    stream_parser.add_argument("--weights", default=WEIGHTS_FILE)
+    stream_parser.add_argument("--images", required=True, help=".npy of (n, 400) images, read in chunks")
+    stream_parser.add_argument("--output", help=".npy for uint8 labels, any other path for text (default stdout)")
+    stream_parser.add_argument("--chunk-size", type=int, default=8192, help="images read per chunk")
+    stream_parser.add_argument("--batch-size", type=int, default=256)
+
+    parallel_parser = subparsers.add_parser("parallel", help="measure multi-process scoring scaling")
+    parallel_parser.add_argument("--weights", default=WEIGHTS_FILE)
+    parallel_parser.add_argument("--images", help=".npy of (n, 400) images (default: cached training set)")
+    parallel_parser.add_argument("--rows", type=int, default=200_000, help="tile the images up to this many rows")
+    parallel_parser.add_argument("--workers", type=int, help="largest pool size to try (default: all cores)")
+    parallel_parser.add_argument("--batch-size", type=int, default=256)
+
+    quantize_parser = subparsers.add_parser("quantize", help="compare the int8 path with float32")
+    quantize_parser.add_argument("--weights", default=WEIGHTS_FILE)
+    quantize_parser.add_argument("--images", help=".npz with X and y (default: cached training set)")
+
+    numpy_parser = subparsers.add_parser("train-numpy", help="train with NumpyTrainer instead of Keras")
+    numpy_parser.add_argument("--epochs", type=int, default=20)
+    numpy_parser.add_argument("--batch-size", type=int, default=32)
+    numpy_parser.add_argument("--weights", default=WEIGHTS_FILE, help="where to save W1..b3")
+    numpy_parser.add_argument("--compare-keras", action="store_true",
+                              help="instead, benchmark time-to-accuracy against Keras")
+    numpy_parser.add_argument("--target", type=float, default=0.9, help="accuracy for --compare-keras")
+
+    bench_parser = subparsers.add_parser("bench", help="benchmark every forward path with per-layer profiles")
+    bench_parser.add_argument("--weights", default=WEIGHTS_FILE)
+    bench_parser.add_argument("--images", help=".npy of (n, 400) images (default: cached training set)")
+    bench_parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 32, 256, 2048])
+    bench_parser.add_argument("--keras", action="store_true", help="include model.predict (needs TensorFlow)")
+    bench_parser.add_argument("--output", help="write the JSON report here")
+    bench_parser.add_argument("--baseline", help="JSON report to compare against; exit 1 on regressions")
+    bench_parser.add_argument("--tolerance", type=float, default=0.2,
+                              help="allowed fractional slowdown against the baseline")
+
+    kernels_parser = subparsers.add_parser("kernels", help="benchmark the legacy and fused activation kernels")
+    kernels_parser.add_argument("--rows", type=int, default=65536)
+    kernels_parser.add_argument("--classes", type=int, default=10)
+
+    subparsers.add_parser("import-time", help="compare import time with TensorFlow and matplotlib")
+    args = parser.parse_args(argv)
+
+    if args.command == "predict":
+        predict(args.weights, args.images, args.labels, args.batch_size)
+    elif args.command == "stream":
+        stream_predict_file(args.weights, args.images, args.output, args.chunk_size, args.batch_size)
+    elif args.command == "parallel":
+        X = np.load(args.images, mmap_mode="r") if args.images else load_data()[0]
+        X = np.resize(np.asarray(X, dtype=np.float32), (args.rows, X.shape[1]))
+        benchmark_scaling(load_weights(args.weights), X, args.workers, args.batch_size)
+    elif args.command == "quantize":
+        X, y = read_images(args.images) if args.images else load_data()
+        if y is None:
+            parser.error("quantize needs labels; pass an .npz with X and y")
+        quantization_report(load_weights(args.weights), X, y)
+    elif args.command == "train-numpy":
+        X, y = load_data()
+        if args.compare_keras:
+            benchmark_training(X, y, args.target, args.epochs)
+        else:
+            trainer = NumpyTrainer(batch_size=args.batch_size).fit(X, y, args.epochs)
+            save_weights(trainer.layers(), args.weights)
+            print(f"Weights saved to {args.weights}")
+    elif args.command == "bench":
+        layers = load_weights(args.weights)
+        X = np.load(args.images, mmap_mode="r") if args.images else load_data()[0]
+        report = run_benchmarks(layers, X, args.batch_sizes,
+                                model=keras_model(layers) if args.keras else None)
+        print_benchmarks(report)
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(report, f, indent=2)
+        if args.baseline:
+            with open(args.baseline) as f:
+                failures = check_regressions(report, json.load(f), args.tolerance)
+            for failure in failures:
+                print(f"REGRESSION {failure}")
+            if failures:
+                sys.exit(1)
+    elif args.command == "kernels":
+        benchmark_kernels(args.rows, args.classes)
+    elif args.command == "import-time":
+        measure_import_time()
+    elif args.command == "train":
+        train(args.epochs, args.weights, plot=not args.no_plot, benchmark=not args.no_benchmark)
+    else:
+        train()
+
+
+if __name__ == "__main__":
+    main()
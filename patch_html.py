@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Replace named JavaScript functions inside the <script> blocks of HTML pages.
+
+Functions are found by scanning the scripts once and tracking braces, while
+skipping strings, template literals, comments and regex literals, so a '}'
+inside a string or nested block never ends a function early. Every page is
+patched in memory first; nothing is written unless all replacements apply,
+and each file is then swapped in with a rename.
+
+    python patch_html.py public/demos/*.html --replace loadData=loadData.js
+    python patch_html.py public/demos/six-degrees.html --replace loadData=loadData.js --dry-run
+"""
+import argparse
+import difflib
+import os
+import re
+import shutil
+import sys
+import tempfile
+
+SCRIPT_OPEN = re.compile(r'<script\b[^>]*>', re.IGNORECASE)
+SCRIPT_CLOSE = re.compile(r'</script\s*>', re.IGNORECASE)
+IDENTIFIER = re.compile(r'[A-Za-z_$][\w$]*')
+FUNCTION_NAME = re.compile(r'\s*\*?\s*([A-Za-z_$][\w$]*)?')
+# After these a '/' starts a regex literal rather than a division
+REGEX_PRECEDERS = set('(,=:[!&|?{};+-*%<>~^')
+REGEX_KEYWORDS = {'return', 'typeof', 'case', 'do', 'else', 'in', 'of', 'new',
+                  'delete', 'void', 'throw', 'yield', 'await'}
+
+
+def script_ranges(html):
+    """(start, end) offsets of the contents of every <script> block."""
+    pos = 0
+    while True:
+        opening = SCRIPT_OPEN.search(html, pos)
+        if opening is None:
+            return
+        closing = SCRIPT_CLOSE.search(html, opening.end())
+        end = closing.start() if closing else len(html)
+        yield opening.end(), end
+        pos = end
+
+
+def skip_string(source, i, quote):
+    """Index just past the string literal whose opening quote is at i."""
+    i += 1
+    while i < len(source):
+        c = source[i]
+        if c == '\\':
+            i += 2
+        elif c == quote or c == '\n':
+            return i + 1
+        else:
+            i += 1
+    return i
+
+
+def skip_template(source, i):
+    """Scan template literal text from i; returns (index, True if stopped at '${')."""
+    while i < len(source):
+        c = source[i]
+        if c == '\\':
+            i += 2
+        elif c == '`':
+            return i + 1, False
+        elif c == '$' and source.startswith('{', i + 1):
+            return i + 2, True
+        else:
+            i += 1
+    return i, False
+
+
+def skip_regex(source, i):
+    """Index just past the regex literal body starting at the '/' at i."""
+    i += 1
+    in_class = False
+    while i < len(source):
+        c = source[i]
+        if c == '\\':
+            i += 2
+            continue
+        if c == '\n':
+            return i
+        if c == '[':
+            in_class = True
+        elif c == ']':
+            in_class = False
+        elif c == '/' and not in_class:
+            return i + 1
+        i += 1
+    return i
+
+
+def scan_functions(source, start, end, found):
+    """Add (start, end) spans of the function declarations in source[start:end] to found.
+
+    A span runs from 'function' (or a preceding 'async') to the closing
+    brace of the body, widened to the start of its line when only
+    indentation comes before it.
+    """
+    stack = []          # 'block', 'template' or (name, declaration start) per open brace
+    pending = None      # [name, declaration start, paren depth, params closed]
+    paren_depth = 0
+    last_word = last_word_start = None
+    prev = ''           # last significant character or keyword, for regex detection
+    i = start
+    while i < end:
+        c = source[i]
+        if c.isspace():
+            i += 1
+        elif c == '/' and source.startswith('/', i + 1):
+            newline = source.find('\n', i, end)
+            i = end if newline < 0 else newline
+        elif c == '/' and source.startswith('*', i + 1):
+            close = source.find('*/', i + 2, end)
+            i = end if close < 0 else close + 2
+        elif c in '\'"':
+            i = skip_string(source, i, c)
+            prev, last_word = 'literal', None
+        elif c == '`':
+            i, interpolation = skip_template(source, i + 1)
+            if interpolation:
+                stack.append('template')
+                prev = '{'
+            else:
+                prev = 'literal'
+            last_word = None
+        elif c == '/' and (prev in REGEX_PRECEDERS or prev in REGEX_KEYWORDS or prev == ''):
+            i = skip_regex(source, i)
+            prev, last_word = 'literal', None
+        elif c.isalpha() or c in '_$':
+            word = IDENTIFIER.match(source, i).group()
+            if word == 'function':
+                declaration = last_word_start if last_word == 'async' else i
+                name_match = FUNCTION_NAME.match(source, i + len(word))
+                pending = [name_match.group(1), declaration, paren_depth, False]
+                i = name_match.end()
+                last_word = None
+            else:
+                last_word, last_word_start = word, i
+                i += len(word)
+            prev = word
+        elif c.isdigit():
+            i += 1
+            while i < end and (source[i].isalnum() or source[i] in '._'):
+                i += 1
+            prev, last_word = 'literal', None
+        else:
+            if c == '(':
+                paren_depth += 1
+            elif c == ')':
+                paren_depth -= 1
+                if pending and paren_depth == pending[2]:
+                    pending[3] = True
+            elif c == '{':
+                if pending and pending[3] and paren_depth == pending[2]:
+                    stack.append((pending[0], pending[1]))
+                    pending = None
+                else:
+                    stack.append('block')
+            elif c == '}' and stack:
+                opened = stack.pop()
+                if opened == 'template':
+                    i, interpolation = skip_template(source, i + 1)
+                    if interpolation:
+                        stack.append('template')
+                    prev, last_word = 'literal', None
+                    continue
+                if opened != 'block' and opened[0] is not None:
+                    name, declaration = opened
+                    line_start = source.rfind('\n', 0, declaration) + 1
+                    if not source[line_start:declaration].strip():
+                        declaration = line_start
+                    found.setdefault(name, []).append((declaration, i + 1))
+            elif c == ';' and pending and paren_depth == pending[2]:
+                pending = None
+            prev, last_word = c, None
+            i += 1
+
+
+def find_functions(html):
+    """Map each function name declared in the page's scripts to its spans."""
+    found = {}
+    for start, end in script_ranges(html):
+        scan_functions(html, start, end, found)
+    return found
+
+
+def patch_source(html, replacements):
+    """Return html with each named function replaced by its new source.
+
+    Raises ValueError when a function is missing, declared more than once,
+    or nested inside another function being replaced. Replacements take on
+    the page's line endings.
+    """
+    functions = find_functions(html)
+    crlf = '\r\n' in html
+    spans = []
+    for name, text in replacements.items():
+        matches = functions.get(name, [])
+        if len(matches) != 1:
+            problem = 'not found' if not matches else f'declared {len(matches)} times'
+            raise ValueError(f"function {name}() {problem}")
+        if crlf:
+            text = text.replace('\r\n', '\n').replace('\n', '\r\n')
+        spans.append((*matches[0], name, text))
+    spans.sort()
+    for (_, end, outer, _), (start, _, inner, _) in zip(spans, spans[1:]):
+        if start < end:
+            raise ValueError(f"function {inner}() overlaps {outer}()")
+
+    parts = []
+    pos = 0
+    for start, end, _, text in spans:
+        parts += [html[pos:start], text]
+        pos = end
+    parts.append(html[pos:])
+    return ''.join(parts)
+
+
+def write_atomic(path, text):
+    """Write text to path through a temporary file in the same directory and a rename."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', prefix='.patch-', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8', newline='') as f:
+            f.write(text)
+        shutil.copymode(path, tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def read_page(path):
+    """Page text with its line endings untouched."""
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        return f.read()
+
+
+def save_page(path, original, updated, dry_run=False):
+    """Write updated atomically, or with dry_run print its diff against original."""
+    if dry_run:
+        sys.stdout.writelines(difflib.unified_diff(
+            original.splitlines(keepends=True), updated.splitlines(keepends=True), path, path))
+    else:
+        write_atomic(path, updated)
+
+
+def patch_files(paths, replacements, dry_run=False):
+    """Apply replacements to every page, or print a unified diff with dry_run.
+
+    All pages are patched in memory before any is written, so an error in
+    one page leaves every file untouched. Returns the paths that changed.
+    """
+    patched = []
+    for path in paths:
+        original = read_page(path)
+        try:
+            updated = patch_source(original, replacements)
+        except ValueError as error:
+            raise ValueError(f"{path}: {error}") from None
+        if updated != original:
+            patched.append((path, original, updated))
+
+    for path, original, updated in patched:
+        save_page(path, original, updated, dry_run)
+    return [path for path, _, _ in patched]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replace named JavaScript functions in HTML pages")
+    parser.add_argument("pages", nargs="+", help="HTML files to patch")
+    parser.add_argument("--replace", action="append", required=True, metavar="NAME=FILE",
+                        help="replace function NAME with the source in FILE (repeatable)")
+    parser.add_argument("--dry-run", action="store_true", help="print a diff instead of writing")
+    args = parser.parse_args(argv)
+
+    replacements = {}
+    for spec in args.replace:
+        name, _, source_path = spec.partition("=")
+        with open(source_path, 'r', encoding='utf-8') as f:
+            replacements[name] = f.read().rstrip('\n')
+
+    try:
+        changed = patch_files(args.pages, replacements, args.dry_run)
+    except (OSError, ValueError) as error:
+        print(f"Error: {error}")
+        sys.exit(1)
+    verb = "Would patch" if args.dry_run else "Patched"
+    print(f"{verb} {len(changed)} of {len(args.pages)} page(s)", file=sys.stderr if args.dry_run else sys.stdout)
+
+
+if __name__ == "__main__":
+    main()
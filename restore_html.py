@@ -2,19 +2,15 @@
 """
 Script to restore the Six Degrees HTML file to the working JSON version
 """
+import argparse
+import sys
 
-def restore_html_file():
-    html_file = "public/demos/six-degrees.html"
-    
-    # Read the current HTML file
-    with open(html_file, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
-    # Find and replace the loadData function with the working JSON version
-    old_loadData_pattern = '''        async function loadData() {'''
-    
-    # The working JSON version
-    new_loadData = '''        async function loadData() {
+from patch_html import patch_files
+
+HTML_FILE = "public/demos/six-degrees.html"
+
+# The working JSON version
+JSON_LOAD_DATA = '''        async function loadData() {
             // Show loading indicator
             document.getElementById('loading').style.display = 'block';
             document.getElementById('findBtn').disabled = true;
@@ -99,53 +95,24 @@ def restore_html_file():
                 alert('Error loading database. Please refresh the page.');
             }
         }'''
-    
-    # Find the start of the loadData function and replace everything until the closing brace
-    import re
-    
-    # Pattern to match the entire loadData function
-    pattern = r'        async function loadData\(\) \{[^}]*\}'
-    
-    # Find the function and replace it
-    if re.search(pattern, content, re.DOTALL):
-        updated_content = re.sub(pattern, new_loadData, content, flags=re.DOTALL)
-        
-        # Write the updated content back
-        with open(html_file, 'w', encoding='utf-8') as f:
-            f.write(updated_content)
-        
+
+
+def restore_html_file(dry_run=False):
+    try:
+        changed = patch_files([HTML_FILE], {"loadData": JSON_LOAD_DATA}, dry_run)
+    except (OSError, ValueError) as error:
+        print(f"Could not restore {HTML_FILE}: {error}")
+        sys.exit(1)
+
+    if dry_run:
+        return
+    if changed:
         print("HTML file restored successfully to working JSON version!")
     else:
-        print("Could not find the loadData function to replace. The file might already be in the correct state.")
-        
-        # Let's try a different approach - find the function manually
-        lines = content.split('\n')
-        new_lines = []
-        skip_lines = False
-        
-        for i, line in enumerate(lines):
-            if 'async function loadData()' in line:
-                skip_lines = True
-                # Add the new function
-                new_lines.extend(new_loadData.split('\n'))
-                continue
-            
-            if skip_lines and line.strip() == '}' and i > 0:
-                # Check if this is the end of the loadData function
-                # Look for the next function or end of script
-                next_lines = lines[i+1:i+5]
-                if any('function ' in next_line for next_line in next_lines) or any('// ' in next_line for next_line in next_lines):
-                    skip_lines = False
-                    continue
-            
-            if not skip_lines:
-                new_lines.append(line)
-        
-        # Write the updated content back
-        with open(html_file, 'w', encoding='utf-8') as f:
-            f.write('\n'.join(new_lines))
-        
-        print("HTML file restored successfully to working JSON version!")
+        print("HTML file already uses the working JSON version.")
+
 
 if __name__ == "__main__":
-    restore_html_file()
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--dry-run", action="store_true", help="print a diff instead of writing")
+    restore_html_file(parser.parse_args().dry_run)
@@ -0,0 +1,714 @@
+#!/usr/bin/env python3
+"""
+Build the Six Degrees person-movie graph from the Parquet files and export it
+as a compact binary file the page can map straight into typed arrays.
+
+Binary layout (graph.bin, all integers little-endian, every section padded to
+a multiple of 4 bytes):
+
+    header          magic "SDG1", then uint32 version, people, movies, edges,
+                    name_bytes, title_bytes
+    person_offsets  uint32[people + 1]   CSR offsets into person_movies
+    person_movies   uint32[edges]        movie indices, sorted per person
+    movie_offsets   uint32[movies + 1]   CSR offsets into movie_people
+    movie_people    uint32[edges]        person indices, sorted per movie
+    births          uint16[people]       0 when unknown
+    years           uint16[movies]       0 when unknown
+    name_offsets    uint32[people + 1]   offsets into the name bytes
+    title_offsets   uint32[movies + 1]   offsets into the title bytes
+    names           utf-8[name_bytes]
+    titles          utf-8[title_bytes]
+
+People and movies are renumbered densely in Parquet row order, so person i is
+row i of people.parquet (after the export caps) and likewise for movies.
+
+The export also writes name_index.json, which replaces the names map loadData
+builds at runtime:
+
+    {"names": [...], "offsets": [...], "people": [...]}
+
+`names` holds every distinct lowercased name sorted by UTF-16 code units (the
+order JavaScript's < uses), and the dense person ids for names[i] are
+people[offsets[i]:offsets[i + 1]]. An exact lookup is one binary search, and
+all names starting with a prefix form a contiguous run from the prefix's
+insertion point, which is what autocomplete needs.
+
+With --landmarks it also writes search.bin, tables that let a query skip or
+cut short its BFS:
+
+    header          magic "SDL1", then uint32 version, people, movies, edges,
+                    graph_crc, landmarks, label_bytes, distance_bytes
+    landmarks       uint32[landmarks]             landmark person indices
+    components      uint{8*label_bytes}[people]   connected-component label
+    distances       uint{8*distance_bytes}[people * landmarks]
+                                                  person-major hop counts from
+                                                  each landmark, max = unreachable
+
+Two people with different labels are never connected, and for any landmark L
+the triangle inequality gives |d(L, a) - d(L, b)| <= d(a, b). graph_crc is the
+CRC-32 of the person CSR arrays; together with the counts it ties the tables
+to the graph they were built from, and PathFinder refuses any other graph.
+"""
+import argparse
+import json
+import os
+import struct
+import sys
+import time
+import zlib
+from bisect import bisect_left
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from convert_to_json import JSON_DIR, TABLES, read_columns
+
+GRAPH_FILE = "graph.bin"
+NAME_INDEX_FILE = "name_index.json"
+
+# AI_ALGORITHMS.md performance target for a single path query
+PATH_TARGET_SECONDS = 2.0
+MAGIC = b"SDG1"
+VERSION = 1
+HEADER = struct.Struct("<4s6I")
+
+SEARCH_FILE = "search.bin"
+SEARCH_MAGIC = b"SDL1"
+SEARCH_VERSION = 2
+SEARCH_HEADER = struct.Struct("<4s8I")
+
+
+class Graph:
+    """Bipartite person-movie graph in CSR form with dense integer ids."""
+
+    def __init__(self, person_offsets, person_movies, movie_offsets, movie_people,
+                 births, years, name_offsets, names, title_offsets, titles):
+        self.person_offsets = person_offsets
+        self.person_movies = person_movies
+        self.movie_offsets = movie_offsets
+        self.movie_people = movie_people
+        self.births = births
+        self.years = years
+        self.name_offsets = name_offsets
+        self.names = names
+        self.title_offsets = title_offsets
+        self.titles = titles
+
+    @property
+    def num_people(self):
+        return len(self.person_offsets) - 1
+
+    @property
+    def num_movies(self):
+        return len(self.movie_offsets) - 1
+
+    @property
+    def num_edges(self):
+        return len(self.person_movies)
+
+    def movies_for(self, person):
+        return self.person_movies[self.person_offsets[person]:self.person_offsets[person + 1]]
+
+    def people_in(self, movie):
+        return self.movie_people[self.movie_offsets[movie]:self.movie_offsets[movie + 1]]
+
+    def name(self, person):
+        start, end = self.name_offsets[person], self.name_offsets[person + 1]
+        return bytes(self.names[start:end]).decode("utf-8")
+
+    def title(self, movie):
+        start, end = self.title_offsets[movie], self.title_offsets[movie + 1]
+        return bytes(self.titles[start:end]).decode("utf-8")
+
+
+def read_table(name, all_rows=False):
+    """Read one table's export columns, applying the same row cap as the JSON export."""
+    columns, cap = TABLES[name]
+    return read_columns(name, columns, None if all_rows else cap)
+
+
+def csr(rows, cols, n):
+    """CSR offsets and neighbours for edges (rows[i] -> cols[i]) over n rows."""
+    order = np.argsort(rows, kind="stable")
+    offsets = np.zeros(n + 1, dtype=np.uint32)
+    offsets[1:] = np.cumsum(np.bincount(rows, minlength=n))
+    return offsets, cols[order].astype(np.uint32)
+
+
+def string_table(column):
+    """Offsets and UTF-8 bytes of a string column, with nulls stored as ''."""
+    array = pc.fill_null(column.cast(pa.string()), "").combine_chunks()
+    if len(array) == 0:
+        return np.zeros(1, dtype=np.uint32), np.zeros(0, dtype=np.uint8)
+    raw = np.frombuffer(array.buffers()[1], dtype=np.int32)[array.offset:array.offset + len(array) + 1]
+    data = np.frombuffer(array.buffers()[2], dtype=np.uint8)[raw[0]:raw[-1]]
+    return (raw - raw[0]).astype(np.uint32), data
+
+
+def small_years(column):
+    """uint16 years from a nullable id-like column, 0 when unknown."""
+    values = pc.fill_null(column.cast(pa.int64()), 0).to_numpy(zero_copy_only=False)
+    return np.clip(values, 0, np.iinfo(np.uint16).max).astype(np.uint16)
+
+
+def dense_ids(values, keys):
+    """Map each value to its row in `keys` as a nullable int32 array, joining on strings."""
+    return pc.index_in(values.cast(pa.string()), value_set=keys.cast(pa.string()).combine_chunks())
+
+
+def build_graph(people, movies, stars):
+    """Build the CSR graph, dropping edges whose person or movie was not exported."""
+    person_idx = dense_ids(stars["person_id"], people["id"])
+    movie_idx = dense_ids(stars["movie_id"], movies["id"])
+    keep = pc.and_(pc.is_valid(person_idx), pc.is_valid(movie_idx))
+    p = pc.filter(person_idx, keep).to_numpy(zero_copy_only=False).astype(np.uint64)
+    m = pc.filter(movie_idx, keep).to_numpy(zero_copy_only=False).astype(np.uint64)
+
+    # The page stores neighbours in Sets, so duplicate edges collapse; np.unique
+    # on the packed (person, movie) key does the same and sorts by person.
+    edges = np.unique((p << np.uint64(32)) | m)
+    p = (edges >> np.uint64(32)).astype(np.int64)
+    m = (edges & np.uint64(0xFFFFFFFF)).astype(np.int64)
+
+    person_offsets, person_movies = csr(p, m, people.num_rows)
+    movie_offsets, movie_people = csr(m, p, movies.num_rows)
+    name_offsets, names = string_table(people["name"])
+    title_offsets, titles = string_table(movies["title"])
+    return Graph(person_offsets, person_movies, movie_offsets, movie_people,
+                 small_years(people["birth"]), small_years(movies["year"]),
+                 name_offsets, names, title_offsets, titles)
+
+
+def load_graph(all_rows=False):
+    """Build the graph from the Parquet files in PARQUET_DIR."""
+    return build_graph(read_table("people", all_rows), read_table("movies", all_rows),
+                       read_table("stars", all_rows))
+
+
+def section_layout(people, movies, edges):
+    """(attribute, dtype, length) of every array section, in file order."""
+    return [
+        ("person_offsets", "<u4", people + 1),
+        ("person_movies", "<u4", edges),
+        ("movie_offsets", "<u4", movies + 1),
+        ("movie_people", "<u4", edges),
+        ("births", "<u2", people),
+        ("years", "<u2", movies),
+        ("name_offsets", "<u4", people + 1),
+        ("title_offsets", "<u4", movies + 1),
+    ]
+
+
+def padding(nbytes):
+    return -nbytes % 4
+
+
+def write_graph_binary(graph, path):
+    """Write the graph in the SDG1 layout. Returns the file size in bytes."""
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, graph.num_people, graph.num_movies,
+                            graph.num_edges, len(graph.names), len(graph.titles)))
+        for attribute, dtype, _ in section_layout(graph.num_people, graph.num_movies,
+                                                  graph.num_edges):
+            data = np.ascontiguousarray(getattr(graph, attribute), dtype=dtype).tobytes()
+            f.write(data + b"\0" * padding(len(data)))
+        for data in (graph.names, graph.titles):
+            data = np.ascontiguousarray(data, dtype=np.uint8).tobytes()
+            f.write(data + b"\0" * padding(len(data)))
+    return os.path.getsize(path)
+
+
+def read_graph_binary(path, in_memory=False):
+    """Memory-map an SDG1 file; the arrays are read-only views, nothing is parsed.
+
+    With in_memory the whole file is read up front and the arrays view those
+    bytes instead, so no access later waits on the disk.
+    """
+    if in_memory:
+        with open(path, "rb") as f:
+            buffer = np.frombuffer(f.read(), dtype=np.uint8)
+    else:
+        buffer = np.memmap(path, dtype=np.uint8, mode="r")
+    magic, version, people, movies, edges, name_bytes, title_bytes = HEADER.unpack_from(buffer)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path} is not a version {VERSION} Six Degrees graph file")
+
+    arrays = {}
+    offset = HEADER.size
+    for attribute, dtype, length in section_layout(people, movies, edges):
+        arrays[attribute] = np.frombuffer(buffer, dtype=dtype, count=length, offset=offset)
+        nbytes = arrays[attribute].nbytes
+        offset += nbytes + padding(nbytes)
+    arrays["names"] = buffer[offset:offset + name_bytes]
+    offset += name_bytes + padding(name_bytes)
+    arrays["titles"] = buffer[offset:offset + title_bytes]
+    return Graph(**arrays)
+
+
+def js_order(name):
+    """Sort key matching JavaScript string comparison (UTF-16 code units)."""
+    return name.encode("utf-16-be")
+
+
+class NameIndex:
+    """Sorted lowercase-name index over dense person ids."""
+
+    def __init__(self, names, offsets, people):
+        self.names = names
+        self.offsets = offsets
+        self.people = people
+
+    def lookup(self, name):
+        """Dense person ids with exactly this name (case-insensitive)."""
+        key = name.lower()
+        i = bisect_left(self.names, js_order(key), key=js_order)
+        if i < len(self.names) and self.names[i] == key:
+            return self.people[self.offsets[i]:self.offsets[i + 1]]
+        return []
+
+    def complete(self, prefix, limit=10):
+        """Up to `limit` lowercase names starting with `prefix`, in sorted order."""
+        prefix = prefix.lower()
+        i = bisect_left(self.names, js_order(prefix), key=js_order)
+        matches = []
+        while i < len(self.names) and len(matches) < limit and self.names[i].startswith(prefix):
+            matches.append(self.names[i])
+            i += 1
+        return matches
+
+
+def names_array(graph):
+    """Person names as an Arrow string array, rebuilt from the graph's string table."""
+    return pa.StringArray.from_buffers(
+        graph.num_people,
+        pa.py_buffer(np.ascontiguousarray(graph.name_offsets, dtype=np.int32)),
+        pa.py_buffer(np.ascontiguousarray(graph.names, dtype=np.uint8)),
+    )
+
+
+def build_name_index(graph):
+    """Group dense person ids by lowercased name, sorted for binary search."""
+    lowered = pc.utf8_lower(names_array(graph)).to_pylist()
+    order = sorted(range(len(lowered)), key=lambda i: js_order(lowered[i]))
+
+    names, offsets, people = [], [0], []
+    for person in order:
+        if not names or names[-1] != lowered[person]:
+            if names:
+                offsets.append(len(people))
+            names.append(lowered[person])
+        people.append(person)
+    if names:
+        offsets.append(len(people))
+    return NameIndex(names, offsets, people)
+
+
+def write_name_index(index, path):
+    """Write the name index as minified JSON. Returns the file size in bytes."""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'names': index.names, 'offsets': index.offsets, 'people': index.people},
+                  f, ensure_ascii=False, separators=(",", ":"))
+    return os.path.getsize(path)
+
+
+def read_name_index(path):
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    return NameIndex(data['names'], data['offsets'], data['people'])
+
+
+def gather(offsets, neighbors, nodes):
+    """Concatenated CSR neighbours of `nodes`, plus the position in `nodes` each came from."""
+    starts = offsets[nodes].astype(np.int64)
+    counts = offsets[nodes + 1].astype(np.int64) - starts
+    owner = np.repeat(np.arange(len(nodes)), counts)
+    # Position of each output within its node's run, shifted to that run's start
+    firsts = np.repeat(np.cumsum(counts) - counts, counts)
+    return neighbors[np.arange(len(owner)) - firsts + starts[owner]], owner
+
+
+def segment_min(values, offsets, fill):
+    """Minimum of each CSR segment of `values`, or `fill` for empty segments."""
+    out = np.full(len(offsets) - 1, fill, dtype=values.dtype)
+    nonempty = offsets[:-1] < offsets[1:]
+    if len(values):
+        out[nonempty] = np.minimum.reduceat(values, offsets[:-1][nonempty].astype(np.int64))
+    return out
+
+
+def connected_components(graph):
+    """Dense component label per person, by min-label propagation with shortcutting."""
+    labels = np.arange(graph.num_people, dtype=np.int64)
+    while True:
+        movie_labels = segment_min(labels[graph.movie_people], graph.movie_offsets, graph.num_people)
+        reached = segment_min(movie_labels[graph.person_movies], graph.person_offsets, graph.num_people)
+        updated = np.minimum(labels, reached)
+        # Every label is a person in the same component, so jumping to the
+        # label's own label is safe and collapses long chains quickly.
+        updated = updated[updated]
+        if np.array_equal(updated, labels):
+            break
+        labels = updated
+    _, dense = np.unique(labels, return_inverse=True)
+    return dense
+
+
+def bfs_distances(graph, source):
+    """Person-hop distance from `source` to every person, -1 when unreachable."""
+    distances = np.full(graph.num_people, -1, dtype=np.int64)
+    movie_seen = np.zeros(graph.num_movies, dtype=bool)
+    distances[source] = 0
+    frontier = np.array([source], dtype=np.int64)
+    depth = 0
+    while len(frontier):
+        movies, _ = gather(graph.person_offsets, graph.person_movies, frontier)
+        movies = np.unique(movies[~movie_seen[movies]])
+        movie_seen[movies] = True
+        people, _ = gather(graph.movie_offsets, graph.movie_people, movies)
+        people = np.unique(people[distances[people] < 0])
+        depth += 1
+        distances[people] = depth
+        frontier = people.astype(np.int64)
+    return distances
+
+
+def smallest_uint(max_value):
+    return np.uint8 if max_value <= np.iinfo(np.uint8).max else \
+        np.uint16 if max_value <= np.iinfo(np.uint16).max else np.uint32
+
+
+def graph_fingerprint(graph):
+    """(people, movies, edges, CRC-32 of the person CSR arrays) identifying a graph."""
+    crc = zlib.crc32(np.ascontiguousarray(graph.person_offsets, dtype="<u4"))
+    crc = zlib.crc32(np.ascontiguousarray(graph.person_movies, dtype="<u4"), crc)
+    return graph.num_people, graph.num_movies, graph.num_edges, crc
+
+
+class SearchTables:
+    """Component labels and landmark distances for pruning path queries."""
+
+    def __init__(self, landmarks, components, distances, fingerprint):
+        self.landmarks = landmarks
+        self.components = components
+        self.distances = distances
+        self.fingerprint = tuple(fingerprint)
+        self.unreachable = np.iinfo(distances.dtype).max
+
+    def check(self, graph):
+        """Raise ValueError unless the tables were built from this graph."""
+        if graph_fingerprint(graph) != self.fingerprint:
+            people, movies, edges, _ = self.fingerprint
+            raise ValueError(f"search tables were built for a different graph ({people} people, "
+                             f"{movies} movies, {edges} edges), not this one ({graph.num_people} "
+                             f"people, {graph.num_movies} movies, {graph.num_edges} edges)")
+
+    def connected(self, a, b):
+        return self.components[a] == self.components[b]
+
+    def lower_bound(self, a, b):
+        """Largest landmark lower bound on the person-hop distance from a to b."""
+        da = self.distances[a].astype(np.int64)
+        db = self.distances[b].astype(np.int64)
+        known = (da != self.unreachable) & (db != self.unreachable)
+        return int(np.abs(da[known] - db[known]).max()) if known.any() else 0
+
+
+def build_search_tables(graph, num_landmarks=8):
+    """Label components and run BFS from landmarks spread over the largest one.
+
+    The first landmark is the best-connected person; each next one is the
+    person farthest from all landmarks chosen so far.
+    """
+    components = connected_components(graph)
+    degree = np.diff(graph.person_offsets.astype(np.int64))
+    largest = np.bincount(components).argmax() if graph.num_people else 0
+    candidates = (components == largest) & (degree > 0)
+
+    landmarks, rows = [], []
+    nearest = np.where(candidates, np.iinfo(np.int64).max, -1)
+    score = np.where(candidates, degree, -1)
+    for _ in range(min(num_landmarks, int(candidates.sum()))):
+        landmark = int(score.argmax())
+        distances = bfs_distances(graph, landmark)
+        landmarks.append(landmark)
+        rows.append(distances)
+        nearest = np.where(candidates, np.minimum(nearest, distances), -1)
+        score = nearest
+
+    distances = np.stack(rows, axis=1) if rows else np.zeros((graph.num_people, 0), dtype=np.int64)
+    dtype = smallest_uint(int(distances.max(initial=0)) + 1)
+    unreachable = np.iinfo(dtype).max
+    distances = np.where(distances < 0, unreachable, distances).astype(dtype)
+    labels = components.astype(smallest_uint(int(components.max(initial=0))))
+    return SearchTables(np.array(landmarks, dtype=np.uint32), labels, distances, graph_fingerprint(graph))
+
+
+def write_search_tables(tables, path):
+    """Write the tables in the SDL1 layout. Returns the file size in bytes."""
+    labels = tables.components.dtype.itemsize
+    width = tables.distances.dtype.itemsize
+    with open(path, 'wb') as f:
+        f.write(SEARCH_HEADER.pack(SEARCH_MAGIC, SEARCH_VERSION, *tables.fingerprint,
+                                   len(tables.landmarks), labels, width))
+        for array, dtype in ((tables.landmarks, "<u4"),
+                             (tables.components, f"<u{labels}"),
+                             (tables.distances, f"<u{width}")):
+            data = np.ascontiguousarray(array, dtype=dtype).tobytes()
+            f.write(data + b"\0" * padding(len(data)))
+    return os.path.getsize(path)
+
+
+def read_search_tables(path, graph=None):
+    """Memory-map an SDL1 file written by write_search_tables.
+
+    With a graph, raises ValueError unless the file was built from it.
+    """
+    buffer = np.memmap(path, dtype=np.uint8, mode="r")
+    magic, version, *fingerprint, count, labels, width = SEARCH_HEADER.unpack_from(buffer)
+    if magic != SEARCH_MAGIC or version != SEARCH_VERSION:
+        raise ValueError(f"{path} is not a version {SEARCH_VERSION} Six Degrees search file")
+    people = fingerprint[0]
+
+    offset = SEARCH_HEADER.size
+    arrays = []
+    for dtype, length in (("<u4", count), (f"<u{labels}", people), (f"<u{width}", people * count)):
+        arrays.append(np.frombuffer(buffer, dtype=dtype, count=length, offset=offset))
+        offset += arrays[-1].nbytes + padding(arrays[-1].nbytes)
+    landmarks, components, distances = arrays
+    tables = SearchTables(landmarks, components, distances.reshape(people, count), fingerprint)
+    if graph is not None:
+        try:
+            tables.check(graph)
+        except ValueError as error:
+            raise ValueError(f"{path}: {error}") from None
+    return tables
+
+
+class PathFinder:
+    """Bidirectional BFS over the CSR graph, matching the page's shortestPath().
+
+    Each BFS level is expanded with vectorized gathers over whole frontiers.
+    Visited marks are query stamps rather than booleans, so the per-side
+    arrays are allocated once and never cleared between queries. With
+    SearchTables, unconnected pairs are answered without searching and
+    max_degrees queries are rejected early from the landmark lower bound.
+    """
+
+    def __init__(self, graph, tables=None):
+        if tables is not None:
+            tables.check(graph)
+        self.graph = graph
+        self.tables = tables
+        self.stamp = 0
+        self.person_seen = np.zeros((2, graph.num_people), dtype=np.uint32)
+        self.movie_seen = np.zeros((2, graph.num_movies), dtype=np.uint32)
+        # via_movie[side][person] is the movie that reached person, and
+        # via_person[side][movie] is the person that reached the movie
+        self.via_movie = np.zeros((2, graph.num_people), dtype=np.uint32)
+        self.via_person = np.zeros((2, graph.num_movies), dtype=np.uint32)
+        self.expanded = 0
+
+    def expand(self, side, frontier):
+        """Advance one side by one person-movie-person level. Returns the new people."""
+        graph, stamp = self.graph, self.stamp
+        movies, owner = gather(graph.person_offsets, graph.person_movies, frontier)
+        fresh = self.movie_seen[side, movies] != stamp
+        movies, first = np.unique(movies[fresh], return_index=True)
+        self.movie_seen[side, movies] = stamp
+        self.via_person[side, movies] = frontier[owner[fresh][first]]
+
+        people, owner = gather(graph.movie_offsets, graph.movie_people, movies)
+        fresh = self.person_seen[side, people] != stamp
+        people, first = np.unique(people[fresh], return_index=True)
+        self.person_seen[side, people] = stamp
+        self.via_movie[side, people] = movies[owner[fresh][first]]
+
+        self.expanded += len(frontier) + len(movies)
+        return people
+
+    def walk(self, side, person, root):
+        """[(movie, person), ...] hops from `person` back towards this side's root."""
+        hops = []
+        while person != root:
+            movie = int(self.via_movie[side, person])
+            hops.append((movie, person))
+            person = int(self.via_person[side, movie])
+        return hops
+
+    def shortest_path(self, source, target, max_degrees=None):
+        """(movie, person) hops from source to target, [] if equal, None if unconnected.
+
+        With max_degrees, paths longer than that many hops count as unconnected.
+        """
+        source, target = int(source), int(target)
+        self.expanded = 0
+        if source == target:
+            return []
+        if self.tables is not None:
+            if not self.tables.connected(source, target):
+                return None
+            if max_degrees is not None and self.tables.lower_bound(source, target) > max_degrees:
+                return None
+
+        self.stamp += 1
+        frontiers = [np.array([source], dtype=np.int64), np.array([target], dtype=np.int64)]
+        self.person_seen[0, source] = self.person_seen[1, target] = self.stamp
+        depth = 0
+
+        while len(frontiers[0]) and len(frontiers[1]):
+            if max_degrees is not None and depth >= max_degrees:
+                return None
+            side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+            people = self.expand(side, frontiers[side])
+            depth += 1
+            met = people[self.person_seen[1 - side, people] == self.stamp]
+            if len(met):
+                # Any meeting person completes a shortest path: a shorter one
+                # would have met during an earlier, shallower level.
+                meet = int(met[0])
+                path = self.walk(0, meet, source)[::-1]
+                # The target side's hops point back towards the target, so
+                # each movie leads on to the person that reached it.
+                for movie, _ in self.walk(1, meet, target):
+                    path.append((movie, int(self.via_person[1, movie])))
+                return path
+            frontiers[side] = people.astype(np.int64)
+        return None
+
+
+def benchmark_paths(graph, queries=200, seed=0, tables=None, max_degrees=None):
+    """Time shortest_path on random pairs of people who appear in at least one movie."""
+    actors = np.flatnonzero(np.diff(graph.person_offsets))
+    if len(actors) < 2:
+        raise ValueError("graph needs at least two people with movies to benchmark")
+    pairs = np.random.default_rng(seed).choice(actors, size=(queries, 2))
+
+    finder = PathFinder(graph, tables)
+    latencies, expanded, lengths = [], [], []
+    for source, target in pairs:
+        start = time.perf_counter()
+        path = finder.shortest_path(source, target, max_degrees)
+        latencies.append(time.perf_counter() - start)
+        expanded.append(finder.expanded)
+        if path is not None:
+            lengths.append(len(path))
+
+    p50, p99 = np.percentile(latencies, [50, 99])
+    e50, e99 = np.percentile(expanded, [50, 99])
+    print(f"Queries: {queries} ({len(lengths)} connected, mean degrees {np.mean(lengths) if lengths else 0:.2f})")
+    print(f"Latency: p50 {p50 * 1000:.2f} ms, p99 {p99 * 1000:.2f} ms, max {max(latencies) * 1000:.2f} ms")
+    print(f"Nodes expanded: p50 {e50:.0f}, p99 {e99:.0f}")
+    status = "OK" if p99 < PATH_TARGET_SECONDS else "FAIL"
+    print(f"Target p99 < {PATH_TARGET_SECONDS:.0f}s: {status}")
+    return {'p50': p50, 'p99': p99, 'expanded_p50': e50, 'expanded_p99': e99}
+
+
+def load_json_graph(json_dir=JSON_DIR):
+    """Python equivalent of the page's loadData over the JSON files."""
+    people, movies = {}, {}
+    with open(f"{json_dir}/people.json", encoding='utf-8') as f:
+        for person in json.load(f):
+            people[person['id']] = {'name': person['name'], 'movies': set()}
+    with open(f"{json_dir}/movies.json", encoding='utf-8') as f:
+        for movie in json.load(f):
+            movies[movie['id']] = {'title': movie['title'], 'stars': set()}
+    with open(f"{json_dir}/stars.json", encoding='utf-8') as f:
+        for star in json.load(f):
+            if star['person_id'] in people and star['movie_id'] in movies:
+                people[star['person_id']]['movies'].add(star['movie_id'])
+                movies[star['movie_id']]['stars'].add(star['person_id'])
+    return people, movies
+
+
+def compare_formats(graph_path, json_dir=JSON_DIR, repeat=5):
+    """Print size and best-of-`repeat` load time of the JSON files vs graph.bin.
+
+    Both sides end with every value in memory: the JSON is parsed into dicts,
+    and graph.bin is read whole and each array summed, so the timing is not
+    just a memory map that has not touched the data yet.
+    """
+    json_bytes = sum(os.path.getsize(f"{json_dir}/{name}.json") for name in TABLES)
+    graph_bytes = os.path.getsize(graph_path)
+
+    def best(load):
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            load()
+            times.append(time.perf_counter() - start)
+        return min(times)
+
+    json_time = best(lambda: load_json_graph(json_dir))
+    def load_binary():
+        graph = read_graph_binary(graph_path, in_memory=True)
+        for array in vars(graph).values():
+            array.sum()
+
+    graph_time = best(load_binary)
+
+    print(f"JSON files: {json_bytes / 1024:.0f} KB, load {json_time * 1000:.1f} ms")
+    print(f"{os.path.basename(graph_path)}: {graph_bytes / 1024:.0f} KB, load {graph_time * 1000:.2f} ms")
+    print(f"Size ratio: {graph_bytes / json_bytes:.2f}, load speedup: {json_time / graph_time:.0f}x")
+
+
+def export_graph(all_rows=False, output=None, num_landmarks=0):
+    """Build the graph from Parquet and write it next to the JSON files."""
+    output = output or f"{JSON_DIR}/{GRAPH_FILE}"
+    print("Building Six Degrees graph...")
+    graph = load_graph(all_rows)
+    size = write_graph_binary(graph, output)
+    print(f"Graph: {graph.num_people} people, {graph.num_movies} movies, {graph.num_edges} edges")
+    print(f"{os.path.basename(output)}: {size / (1024 * 1024):.2f} MB")
+
+    index = build_name_index(graph)
+    index_path = os.path.join(os.path.dirname(output), NAME_INDEX_FILE)
+    size = write_name_index(index, index_path)
+    print(f"Name index: {len(index.names)} distinct names")
+    print(f"{NAME_INDEX_FILE}: {size / (1024 * 1024):.2f} MB")
+
+    if num_landmarks:
+        tables = build_search_tables(graph, num_landmarks)
+        search_path = os.path.join(os.path.dirname(output), SEARCH_FILE)
+        size = write_search_tables(tables, search_path)
+        print(f"Search tables: {int(tables.components.max(initial=0)) + 1} components, "
+              f"{len(tables.landmarks)} landmarks ({tables.distances.dtype})")
+        print(f"{SEARCH_FILE}: {size / (1024 * 1024):.2f} MB")
+    return output
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Six Degrees graph export tools")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="write the binary CSR graph and name index")
+    export_parser.add_argument("--all-rows", action="store_true", help="export every row instead of the default caps")
+    export_parser.add_argument("--output", help=f"output path (default {JSON_DIR}/{GRAPH_FILE})")
+    export_parser.add_argument("--compare", action="store_true",
+                               help="compare size and load time against the JSON files")
+    export_parser.add_argument("--landmarks", type=int, default=0, metavar="K",
+                               help=f"also write {SEARCH_FILE} with components and K landmark distance tables")
+
+    bench_parser = subparsers.add_parser("bench", help="benchmark shortest-path queries")
+    bench_parser.add_argument("--capped", action="store_true",
+                              help="use the capped export tables instead of the full dataset")
+    bench_parser.add_argument("--graph", help="load a previously exported graph.bin instead of Parquet")
+    bench_parser.add_argument("--search", help=f"prune queries with a {SEARCH_FILE} exported from the same graph")
+    bench_parser.add_argument("--max-degrees", type=int, help="treat longer paths as unconnected")
+    bench_parser.add_argument("--queries", type=int, default=200, help="number of random actor pairs")
+    bench_parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.command == "bench":
+        graph = read_graph_binary(args.graph) if args.graph else load_graph(all_rows=not args.capped)
+        try:
+            tables = read_search_tables(args.search, graph) if args.search else None
+        except ValueError as error:
+            print(f"Error: {error}")
+            sys.exit(1)
+        result = benchmark_paths(graph, args.queries, args.seed, tables, args.max_degrees)
+        sys.exit(0 if result['p99'] < PATH_TARGET_SECONDS else 1)
+    elif args.command == "export":
+        path = export_graph(args.all_rows, args.output, args.landmarks)
+        if args.compare:
+            compare_formats(path)
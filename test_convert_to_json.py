@@ -0,0 +1,84 @@
+import json
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+import convert_to_json
+from convert_to_json import DATA_MANIFEST_FILE, convert_parquet_to_json
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """Small Parquet inputs in tmp_path, with caps below their row counts."""
+    people, movies = 30, 20
+    pq.write_table(pa.table({"id": list(range(people)), "name": [f"p{i}" for i in range(people)],
+                             "birth": [1950 + i for i in range(people)]}), tmp_path / "people.parquet")
+    pq.write_table(pa.table({"id": list(range(movies)), "title": [f"m{i}" for i in range(movies)],
+                             "year": [2000 + i for i in range(movies)]}), tmp_path / "movies.parquet")
+    pq.write_table(pa.table({"person_id": [i % people for i in range(50)],
+                             "movie_id": [i % movies for i in range(50)]}), tmp_path / "stars.parquet")
+    monkeypatch.setattr(convert_to_json, "PARQUET_DIR", str(tmp_path))
+    monkeypatch.setattr(convert_to_json, "JSON_DIR", str(tmp_path))
+    monkeypatch.setattr(convert_to_json, "TABLES", {
+        "people": (("id", "name", "birth"), 10),
+        "movies": (("id", "title", "year"), 5),
+        "stars": (("person_id", "movie_id"), 20),
+    })
+    monkeypatch.setattr(convert_to_json, "report_artifacts", lambda manifest, fmt="json": None)
+    return tmp_path
+
+
+def artifact_rows(data_dir):
+    manifest = json.loads((data_dir / DATA_MANIFEST_FILE).read_text(encoding="utf-8"))
+    return {name: entry["rows"] for name, entry in manifest.items()}
+
+
+def test_incremental_columnar_rebuilds_artifacts_exported_with_other_caps(data_dir, capsys):
+    convert_parquet_to_json(columnar=True)
+    assert artifact_rows(data_dir) == {"people": 10, "movies": 5, "stars": 20}
+
+    convert_parquet_to_json(all_rows=True, incremental=True)
+    assert artifact_rows(data_dir) == {"people": 10, "movies": 5, "stars": 20}
+
+    capsys.readouterr()
+    convert_parquet_to_json(all_rows=True, incremental=True, columnar=True)
+    out = capsys.readouterr().out
+    assert "People: unchanged, skipped" in out
+    assert "Writing columnar artifacts..." in out
+    assert artifact_rows(data_dir) == {"people": 30, "movies": 20, "stars": 50}
+
+    convert_parquet_to_json(all_rows=True, incremental=True, columnar=True)
+    assert "Columnar artifacts: unchanged, skipped" in capsys.readouterr().out
+
+
+def test_incremental_columnar_rebuilds_missing_or_edited_data_manifest(data_dir, capsys):
+    convert_parquet_to_json(incremental=True, columnar=True)
+    (data_dir / DATA_MANIFEST_FILE).unlink()
+    capsys.readouterr()
+    convert_parquet_to_json(incremental=True, columnar=True)
+    assert "Writing columnar artifacts..." in capsys.readouterr().out
+
+    convert_parquet_to_json(all_rows=True, columnar=True)
+    convert_parquet_to_json(incremental=True, columnar=True)
+    assert "Writing columnar artifacts..." in capsys.readouterr().out
+    assert artifact_rows(data_dir) == {"people": 10, "movies": 5, "stars": 20}
+
+
+def test_parallel_memory_budget_is_shared_by_concurrent_workers(data_dir, monkeypatch):
+    budgets = []
+    size_for_budget = convert_to_json.batch_size_for_budget
+    monkeypatch.setattr(convert_to_json, "batch_size_for_budget",
+                        lambda path, columns, mb: budgets.append(mb) or size_for_budget(path, columns, mb))
+    monkeypatch.setattr(convert_to_json, "MIN_SHARD_ROWS", 1)
+    pq.write_table(pq.read_table(data_dir / "stars.parquet"), data_dir / "stars.parquet", row_group_size=10)
+
+    # people and movies are one shard each and stars five, so all 4 workers run at once
+    counts = convert_to_json.convert_parallel(
+        {name: (columns, None) for name, (columns, _) in convert_to_json.TABLES.items()}, 4, max_memory_mb=64)
+    assert counts == {"people": 30, "movies": 20, "stars": 50}
+    assert budgets == [16, 16, 16]
+
+    budgets.clear()
+    convert_to_json.convert_parallel({"people": (("id", "name", "birth"), None)}, 4, max_memory_mb=64)
+    assert budgets == [64]
@@ -0,0 +1,115 @@
+import pytest
+
+from patch_html import find_functions, patch_files, patch_source
+
+PAGE = """<html><head><title>Don't {break}</title></head>
+<body>
+<p>It's a "quote" }</p>
+<script type="module">
+        const people = {};
+        async function loadData() {
+            const s = "}}}";  // a } in a comment
+            const t = `${people[`x${1}`]} }`;
+            /* } */
+            const r = /\\}[}]/g;
+            const o = { a: { b: 1 } };
+            if (a / 2 > 1) { console.log('}'); }
+            function inner(x = {}) { return x; }
+        }
+
+        function findPath(source, target) {
+            return source;
+        }
+</script>
+<script>function other(){ return 1 }</script>
+</body></html>
+"""
+
+LOAD_DATA = """        async function loadData() {
+            console.log('new');
+        }"""
+
+
+def source_of(html, name):
+    (start, end), = find_functions(html)[name]
+    return html[start:end]
+
+
+def test_finds_declarations_past_braces_in_strings_comments_templates_and_regexes():
+    functions = find_functions(PAGE)
+    assert set(functions) == {"loadData", "inner", "findPath", "other"}
+    assert source_of(PAGE, "loadData").startswith("        async function loadData() {\n")
+    assert source_of(PAGE, "loadData").endswith("return x; }\n        }")
+    assert source_of(PAGE, "findPath").endswith("return source;\n        }")
+    assert source_of(PAGE, "other") == "function other(){ return 1 }"
+
+
+def test_division_is_not_a_regex():
+    html = "<script>const ratio = width / height; function after() { return ratio; }</script>"
+    assert source_of(html, "after") == "function after() { return ratio; }"
+
+
+def test_regex_after_keyword_can_hold_braces():
+    html = "<script>function f() { return /[}]{2}/.test(x); }\nfunction g() {}</script>"
+    assert source_of(html, "f") == "function f() { return /[}]{2}/.test(x); }"
+    assert source_of(html, "g") == "function g() {}"
+
+
+def test_default_parameters_with_braces():
+    html = "<script>function h(options = {}, [a] = [{}]) { return options; }</script>"
+    assert source_of(html, "h") == "function h(options = {}, [a] = [{}]) { return options; }"
+
+
+def test_text_outside_scripts_is_ignored():
+    html = "<p>function fake() { }</p><script>function real() {}</script>"
+    assert set(find_functions(html)) == {"real"}
+
+
+def test_patch_replaces_only_the_named_function():
+    patched = patch_source(PAGE, {"loadData": LOAD_DATA})
+    assert LOAD_DATA in patched
+    assert "inner" not in patched
+    assert source_of(patched, "findPath") == source_of(PAGE, "findPath")
+    assert patched.startswith(PAGE[:PAGE.index("        async function")])
+
+
+def test_patch_keeps_crlf_line_endings():
+    html = PAGE.replace("\n", "\r\n")
+    patched = patch_source(html, {"loadData": LOAD_DATA})
+    assert LOAD_DATA.replace("\n", "\r\n") in patched
+    assert "\n" not in patched.replace("\r\n", "")
+
+
+@pytest.mark.parametrize("html, replacements, message", [
+    (PAGE, {"missing": "function missing() {}"}, "not found"),
+    (PAGE + "<script>function other() {}</script>", {"other": "function other() {}"}, "declared 2 times"),
+    (PAGE, {"loadData": LOAD_DATA, "inner": "function inner() {}"}, "overlaps"),
+], ids=["missing", "duplicate", "nested"])
+def test_patch_rejects_missing_duplicate_and_nested_targets(html, replacements, message):
+    with pytest.raises(ValueError, match=message):
+        patch_source(html, replacements)
+
+
+def test_patch_files_writes_nothing_when_any_page_fails(tmp_path):
+    good = tmp_path / "good.html"
+    bad = tmp_path / "bad.html"
+    good.write_text(PAGE, encoding="utf-8")
+    bad.write_text("<script>function unrelated() {}</script>", encoding="utf-8")
+
+    with pytest.raises(ValueError, match="bad.html"):
+        patch_files([str(good), str(bad)], {"loadData": LOAD_DATA})
+    assert good.read_text(encoding="utf-8") == PAGE
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["bad.html", "good.html"]
+
+
+def test_patch_files_dry_run_prints_a_diff(tmp_path, capsys):
+    page = tmp_path / "page.html"
+    page.write_text(PAGE, encoding="utf-8")
+
+    assert patch_files([str(page)], {"loadData": LOAD_DATA}, dry_run=True) == [str(page)]
+    assert page.read_text(encoding="utf-8") == PAGE
+    assert "+            console.log('new');" in capsys.readouterr().out
+
+    patch_files([str(page)], {"loadData": LOAD_DATA})
+    assert LOAD_DATA in page.read_text(encoding="utf-8")
+    assert patch_files([str(page)], {"loadData": LOAD_DATA}) == []
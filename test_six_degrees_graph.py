@@ -0,0 +1,133 @@
+from collections import deque
+
+import numpy as np
+import pyarrow as pa
+import pytest
+
+from six_degrees_graph import (PathFinder, build_graph, build_search_tables, connected_components,
+                               read_search_tables, write_search_tables)
+
+
+def random_graph(seed, people=300, movies=150, edges=420):
+    rng = np.random.default_rng(seed)
+    return build_graph(
+        pa.table({"id": np.arange(people), "name": [f"p{i}" for i in range(people)],
+                  "birth": [None] * people}),
+        pa.table({"id": np.arange(movies), "title": [f"m{i}" for i in range(movies)],
+                  "year": [None] * movies}),
+        pa.table({"person_id": rng.integers(0, people, edges), "movie_id": rng.integers(0, movies, edges)}),
+    )
+
+
+def neighbours(graph, person):
+    for k in range(graph.person_offsets[person], graph.person_offsets[person + 1]):
+        movie = graph.person_movies[k]
+        for j in range(graph.movie_offsets[movie], graph.movie_offsets[movie + 1]):
+            yield int(movie), int(graph.movie_people[j])
+
+
+def bfs_hops(graph, source):
+    """Person-hop distance from source to everyone reachable, by plain BFS."""
+    hops = {source: 0}
+    queue = deque([source])
+    while queue:
+        person = queue.popleft()
+        for _, other in neighbours(graph, person):
+            if other not in hops:
+                hops[other] = hops[person] + 1
+                queue.append(other)
+    return hops
+
+
+def assert_valid_path(graph, source, target, path):
+    person = source
+    for movie, nxt in path:
+        assert (movie, nxt) in set(neighbours(graph, person))
+        person = nxt
+    assert person == target
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_shortest_path_matches_plain_bfs(seed):
+    graph = random_graph(seed)
+    finder = PathFinder(graph)
+    rng = np.random.default_rng(100 + seed)
+    for source in rng.integers(0, graph.num_people, 40):
+        hops = bfs_hops(graph, int(source))
+        for target in rng.integers(0, graph.num_people, 25):
+            path = finder.shortest_path(source, target)
+            if int(target) not in hops:
+                assert path is None
+            else:
+                assert len(path) == hops[int(target)]
+                assert_valid_path(graph, int(source), int(target), path)
+
+
+def test_shortest_path_max_degrees_and_same_person():
+    graph = random_graph(7)
+    finder = PathFinder(graph)
+    hops = bfs_hops(graph, 0)
+    far = max(hops, key=hops.get)
+    assert finder.shortest_path(0, 0) == []
+    assert len(finder.shortest_path(0, far, max_degrees=hops[far])) == hops[far]
+    assert finder.shortest_path(0, far, max_degrees=hops[far] - 1) is None
+
+
+def test_edges_to_unexported_people_and_movies_are_dropped():
+    graph = build_graph(
+        pa.table({"id": [1, 2, 3], "name": ["a", "b", None], "birth": [None, 1950, None]}),
+        pa.table({"id": [10], "title": ["x"], "year": [2000]}),
+        pa.table({"person_id": [1, 2, 99, 3], "movie_id": [10, 10, 10, 11]}),
+    )
+    assert graph.num_edges == 2
+    assert PathFinder(graph).shortest_path(0, 1) == [(0, 1)]
+    assert PathFinder(graph).shortest_path(0, 2) is None
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_connected_components_match_bfs_reachability(seed):
+    graph = random_graph(seed)
+    labels = connected_components(graph)
+    assert labels.max() + 1 == len(np.unique(labels))
+    for source in range(0, graph.num_people, 7):
+        reachable = np.zeros(graph.num_people, dtype=bool)
+        reachable[list(bfs_hops(graph, source))] = True
+        assert np.array_equal(labels == labels[source], reachable)
+
+
+def test_connected_components_collapse_long_chains():
+    people = 500
+    # Person i and i + 1 share movie i, so two 250-person chains meet
+    # nowhere because movie 249 is never cast
+    links = np.delete(np.arange(people - 1), 249)
+    graph = build_graph(
+        pa.table({"id": np.arange(people), "name": ["p"] * people, "birth": [None] * people}),
+        pa.table({"id": np.arange(people), "title": ["m"] * people, "year": [None] * people}),
+        pa.table({"person_id": np.r_[links, links + 1], "movie_id": np.r_[links, links]}),
+    )
+    labels = connected_components(graph)
+    assert len(np.unique(labels)) == 2
+    assert (labels[:250] == labels[0]).all() and (labels[250:] == labels[250]).all()
+    assert labels[0] != labels[250]
+
+
+def test_search_tables_keep_answers_and_reject_other_graphs(tmp_path):
+    graph = random_graph(3)
+    path = str(tmp_path / "search.bin")
+    write_search_tables(build_search_tables(graph, num_landmarks=4), path)
+    tables = read_search_tables(path, graph)
+
+    plain, pruned = PathFinder(graph), PathFinder(graph, tables)
+    rng = np.random.default_rng(5)
+    for source, target in rng.integers(0, graph.num_people, (300, 2)):
+        expected = plain.shortest_path(source, target)
+        found = pruned.shortest_path(source, target)
+        assert (found is None) == (expected is None)
+        if expected is not None:
+            assert len(found) == len(expected)
+            assert tables.lower_bound(source, target) <= len(expected)
+
+    with pytest.raises(ValueError, match="different graph"):
+        read_search_tables(path, random_graph(4))
+    with pytest.raises(ValueError, match="different graph"):
+        PathFinder(random_graph(3, people=301), tables)